@@ -0,0 +1 @@
+from .scheduling import generate_workforce, run_benchmarks, benchmark_app
@@ -0,0 +1,195 @@
+# App/benchmarks/scheduling.py
+import platform
+import time
+import tracemalloc
+from datetime import date, datetime, timedelta
+
+import numpy as np
+from sqlalchemy import func, insert
+from werkzeug.security import generate_password_hash
+
+from App.database import db
+from App.models import User, Staff, Preferences
+from App.controllers.scheduling.Scheduler import Scheduler
+from App.controllers.scheduling.schedule_client import ScheduleClient
+from App.controllers.scheduling.preference_snapshot import PreferenceSnapshot
+from App.controllers.scheduling.metrics import schedule_metrics
+from App.controllers.scheduling.stage_timer import QueryCounter
+
+DEFAULT_SIZES = (10, 100, 1000, 10000)
+DEFAULT_HORIZONS = (7, 30, 90)
+# Largest staff size each strategy is run at; beyond it the run is skipped.
+# One day of OptimalStrategy takes about 560 MB at 5000 staff and grows
+# quadratically, so a larger run can exhaust memory and take the process down
+STAFF_LIMITS = {'optimal': 5000}
+
+# (preferred shift types, probability), roughly what rosters look like in practice
+SHIFT_TYPE_MIX = [
+    (['morning'], 0.40),
+    (['evening'], 0.20),
+    (['night'], 0.10),
+    (['morning', 'evening'], 0.20),
+    (['morning', 'evening', 'night'], 0.10),
+]
+SKILLS = [('cashier', 0.6), ('stocking', 0.4), ('supervisor', 0.1), ('cleaning', 0.3)]
+MAX_HOURS = [(20, 0.10), (24, 0.10), (32, 0.15), (40, 0.55), (48, 0.10)]
+# Weekends are the most common days off
+DAY_OFF_WEIGHTS = np.array([1, 1, 1, 1, 2, 4, 5], dtype=float)
+# Shifts per staff member per week the generated demand asks for
+SHIFTS_PER_STAFF_WEEK = 4
+
+
+def benchmark_app(database_uri='sqlite:///:memory:'):
+    """A separate app on its own database, so benchmarks never touch real data"""
+    from flask.globals import app_ctx
+    from App.main import create_app
+
+    app = create_app({"TESTING": True, "SQLALCHEMY_DATABASE_URI": database_uri})
+    app_ctx._get_current_object().pop()  # create_app leaves its own context pushed
+    return app
+
+
+def generate_workforce(count, seed=0, prefix='bench'):
+    """
+    Insert `count` staff with random but reproducible preferences and return
+    them, loaded in one query. Rows go in with three bulk INSERTs and one
+    shared password hash, so ten thousand staff take well under a second.
+    """
+    rng = np.random.default_rng(seed)
+    first_id = (db.session.query(func.max(User.id)).scalar() or 0) + 1
+    ids = list(range(first_id, first_id + count))
+    password = generate_password_hash('benchmark')
+
+    type_choice = rng.choice(len(SHIFT_TYPE_MIX), size=count, p=[p for _, p in SHIFT_TYPE_MIX])
+    hours_choice = rng.choice([h for h, _ in MAX_HOURS], size=count, p=[p for _, p in MAX_HOURS])
+    skill_draws = rng.random((count, len(SKILLS))) < np.array([p for _, p in SKILLS])
+    days_off = rng.choice(3, size=count, p=[0.5, 0.35, 0.15])
+
+    users, preferences = [], []
+    for i, staff_id in enumerate(ids):
+        users.append({'id': staff_id, 'username': f"{prefix}{staff_id}", 'password': password, 'role': 'staff'})
+        unavailable = rng.choice(7, size=days_off[i], replace=False, p=DAY_OFF_WEIGHTS / DAY_OFF_WEIGHTS.sum())
+        preferences.append({
+            'staff_id': staff_id,
+            'preferred_shift_types': SHIFT_TYPE_MIX[type_choice[i]][0],
+            'skills': [name for (name, _), has in zip(SKILLS, skill_draws[i]) if has],
+            'unavailable_days': sorted(int(day) for day in unavailable),
+            'max_hours_per_week': int(hours_choice[i])
+        })
+
+    db.session.execute(insert(User.__table__), users)
+    db.session.execute(insert(Staff.__table__), [{'id': staff_id} for staff_id in ids])
+    db.session.execute(insert(Preferences.__table__), preferences)
+    db.session.commit()
+    return Staff.query.filter(Staff.id.in_(ids)).order_by(Staff.id).all()
+
+
+def run_benchmarks(app, sizes=DEFAULT_SIZES, horizons=DEFAULT_HORIZONS, strategies=None, shifts_per_day=2,
+                   shift_type='mixed', start_date=date(2025, 1, 6), seed=0, staff_limits=STAFF_LIMITS):
+    """
+    Run each strategy over every staff size and horizon and return a
+    JSON-ready report.
+
+    Every run loads the preference snapshot and assigns the generated
+    shifts in memory, the same work auto_populate does before saving.
+    Each shift's headcount scales with the staff size so demand is about
+    SHIFTS_PER_STAFF_WEEK shifts per member per week.
+    Each result records wall time, peak traced memory, SQL statements and
+    the shared quality metrics (see metrics.schedule_metrics); a run that
+    raises records its error instead. A strategy is not run above its
+    staff_limits size, and those runs record why they were skipped.
+    """
+    scheduler = Scheduler()
+    client = ScheduleClient()
+    names = list(strategies or scheduler.strategies)
+    results = []
+
+    with app.app_context():
+        for size in sizes:
+            db.drop_all()
+            db.create_all()
+            staff_ids = [person.id for person in generate_workforce(size, seed=seed)]
+
+            for days in horizons:
+                end_date = start_date + timedelta(days=days - 1)
+                for name in names:
+                    limit = staff_limits.get(name)
+                    if limit is not None and size > limit:
+                        results.append({"strategy": name, "staff": size, "days": days,
+                                        "skipped": f"more than {limit} staff"})
+                        continue
+                    db.session.expunge_all()
+                    results.append(_run_one(scheduler, client, name, staff_ids, start_date, end_date,
+                                            shifts_per_day, shift_type, size, days))
+        db.session.remove()
+        db.drop_all()
+
+    return {
+        "generated_at": datetime.utcnow().isoformat(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "parameters": {
+            "sizes": list(sizes),
+            "horizons": list(horizons),
+            "strategies": names,
+            "shifts_per_day": shifts_per_day,
+            "shift_type": shift_type,
+            "start_date": start_date.isoformat(),
+            "seed": seed,
+            "staff_limits": dict(staff_limits)
+        },
+        "results": results
+    }
+
+
+def _run_one(scheduler, client, name, staff_ids, start_date, end_date, shifts_per_day, shift_type, size, days):
+    """
+    Time one run untraced, then repeat it under tracemalloc for the peak
+    memory, so the reported wall time carries none of the tracing overhead.
+    """
+    staff = Staff.query.filter(Staff.id.in_(staff_ids)).order_by(Staff.id).all()
+    headcount = max(1, round(size * SHIFTS_PER_STAFF_WEEK / (7 * shifts_per_day)))
+    args = (scheduler, client, name, staff, start_date, end_date, shifts_per_day, shift_type, headcount)
+
+    result = {"strategy": name, "staff": size, "days": days, "headcount_per_shift": headcount}
+    try:
+        with QueryCounter(db.engine) as queries:
+            started = time.perf_counter()
+            shifts, preferences = _schedule(*args)
+            seconds = time.perf_counter() - started
+
+        tracemalloc.start()
+        try:
+            _schedule(*args)
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    except Exception as e:
+        # A strategy that fails or cannot scale to this size is a result, not a reason to stop the suite
+        result["error"] = f"{type(e).__name__}: {e}"
+        return result
+
+    metrics = schedule_metrics(staff, shifts, preferences)
+    return {
+        **result,
+        "shifts": len(shifts),
+        "wall_seconds": round(seconds, 6),
+        "peak_memory_bytes": int(peak),
+        "sql_queries": queries.count,
+        "fairness_score": round(metrics['fairness_score'], 3),
+        "gini": round(metrics['gini'], 4),
+        "preference_satisfaction": round(metrics['preference_satisfaction'], 2),
+        "coverage": round(metrics['coverage'] / 100, 4),
+        "day_night_balance": round(metrics['day_night_balance'], 2),
+        "staff_with_assignments": len({id(person) for shift in shifts for person in shift.assigned_staff})
+    }
+
+
+def _schedule(scheduler, client, name, staff, start_date, end_date, shifts_per_day, shift_type, headcount):
+    """The work a run measures: load preferences, generate the shifts and assign them in memory"""
+    preferences = PreferenceSnapshot.load(staff)
+    shifts = client._generate_shifts_for_period(None, start_date, end_date, shifts_per_day, shift_type)
+    for shift in shifts:
+        shift.required_staff = headcount
+    scheduler.generate_schedule(name, staff, shifts, start_date, end_date, preferences=preferences)
+    return shifts, preferences
@@ -4,6 +4,7 @@ from .initialize import *
 from .admin import *
 from .staff import *
 from .preferences import *
+from .demand import *
 
 
 from .scheduling import Scheduler, EvenDistributeStrategy, MinimizeDaysStrategy, ShiftTypeStrategy
\ No newline at end of file
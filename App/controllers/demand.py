@@ -0,0 +1,87 @@
+from datetime import datetime
+from App.database import db
+from App.models import DemandProfile, Schedule
+from App.controllers.scheduling.demand_plan import DEFAULT_SHIFT_TIMES
+
+
+def _parse_time(value):
+    if value is None or hasattr(value, 'hour'):
+        return value
+    try:
+        return datetime.strptime(value, "%H:%M").time()
+    except (TypeError, ValueError):
+        raise ValueError("times must be given as HH:MM")
+
+
+def _validate_demand(weekday, shift_type, headcount, skill=None, start_time=None, end_time=None):
+    if not isinstance(weekday, int) or weekday < 0 or weekday > 6:
+        raise ValueError("weekday must be an integer in range 0..6")
+    if shift_type not in DEFAULT_SHIFT_TIMES:
+        raise ValueError(f"shift_type must be one of: {', '.join(DEFAULT_SHIFT_TIMES)}")
+    try:
+        headcount = int(headcount)
+    except (TypeError, ValueError):
+        raise ValueError("headcount must be an integer")
+    if headcount < 0:
+        raise ValueError("headcount cannot be negative")
+    return {
+        "weekday": weekday,
+        "shift_type": shift_type,
+        "skill": skill or None,
+        "headcount": headcount,
+        "start_time": _parse_time(start_time),
+        "end_time": _parse_time(end_time)
+    }
+
+
+def _require_schedule(schedule_id):
+    if not db.session.get(Schedule, schedule_id):
+        raise ValueError("Schedule not found")
+
+
+def get_demand(schedule_id):
+    """Return a schedule's demand profile rows as JSON, ordered by weekday"""
+    rows = DemandProfile.query.filter_by(schedule_id=schedule_id).order_by(
+        DemandProfile.weekday, DemandProfile.shift_type, DemandProfile.skill).all()
+    return [row.get_json() for row in rows]
+
+
+def set_demand(schedule_id, weekday, shift_type, headcount, *, skill=None, start_time=None, end_time=None):
+    """Create or update the headcount for one weekday, shift type and skill; 0 removes the row"""
+    _require_schedule(schedule_id)
+    values = _validate_demand(weekday, shift_type, headcount, skill, start_time, end_time)
+
+    demand = DemandProfile.query.filter_by(schedule_id=schedule_id, weekday=values['weekday'],
+                                           shift_type=values['shift_type'], skill=values['skill']).first()
+    if values['headcount'] == 0:
+        if demand:
+            db.session.delete(demand)
+            db.session.commit()
+        return None
+
+    if not demand:
+        demand = DemandProfile(schedule_id=schedule_id)
+    for key, value in values.items():
+        setattr(demand, key, value)
+    db.session.add(demand)
+    db.session.commit()
+    return demand
+
+
+def replace_demand(schedule_id, rows):
+    """Replace a schedule's whole demand profile with `rows` (dicts of set_demand's arguments)"""
+    _require_schedule(schedule_id)
+    if not all(isinstance(row, dict) for row in rows):
+        raise ValueError("demand must be a list of objects")
+    validated = [_validate_demand(row.get('weekday'), row.get('shift_type'), row.get('headcount', 1),
+                                  row.get('skill'), row.get('start_time'), row.get('end_time'))
+                 for row in rows]
+    keys = [(row['weekday'], row['shift_type'], row['skill']) for row in validated]
+    if len(set(keys)) != len(keys):
+        raise ValueError("Each weekday, shift_type and skill may appear only once")
+
+    # All rows are validated before anything is written, so this is all or nothing
+    DemandProfile.query.filter_by(schedule_id=schedule_id).delete()
+    db.session.add_all(DemandProfile(schedule_id=schedule_id, **row) for row in validated if row['headcount'])
+    db.session.commit()
+    return get_demand(schedule_id)
@@ -33,7 +33,9 @@ def get_preferences(staff_id):
     return prefs.get_json()
 
 
-def set_preferences(staff_id, *, preferred_shift_types=None, skills=None, unavailable_days=None, max_hours_per_week=None):
+def set_preferences(staff_id, *, preferred_shift_types=None, skills=None, unavailable_days=None, max_hours_per_week=None,
+                    commit=True):
+    """With commit=False the change is only added to the session, for the caller to commit with its own work"""
     staff = get_user(staff_id)
     if not staff or staff.role != "staff":
         raise ValueError("Invalid staff member")
@@ -59,6 +61,8 @@ def set_preferences(staff_id, *, preferred_shift_types=None, skills=None, unavai
         prefs.max_hours_per_week = max_h
 
     db.session.add(prefs)
+    if not commit:
+        return prefs
     try:
         db.session.commit()
     except IntegrityError:
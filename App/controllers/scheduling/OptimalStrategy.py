@@ -0,0 +1,271 @@
+# scheduling/OptimalStrategy.py
+import heapq
+import time
+from datetime import datetime
+import numpy as np
+from .SchedulingStrategy import SchedulingStrategy
+from .assignment_queue import AssignmentQueue
+
+try:
+    from scipy.optimize import linear_sum_assignment
+except ImportError:  # SciPy is in requirements.txt; fall back to the pure-Python min-cost flow
+    linear_sum_assignment = None
+
+UNASSIGNABLE = 10 ** 9
+
+
+class OptimalStrategy(SchedulingStrategy):
+    """
+    Solves each day as a min-cost assignment of shift slots to staff.
+
+    A staff member's k-th shift of the run costs 2k + 1 (the increase in k²),
+    so the cheapest assignment is also the most balanced one. Shifts outside
+    a member's preferred types add PREFERENCE_PENALTY, which is kept below
+    the load step of 2 so preferences only break ties. Each member can
+    take as many of the day's shifts as the hours left in their
+    max_hours_per_week allow, counting the day's longest shift. One day
+    at a time keeps the cost matrix to the day's slots by the members who
+    can still work, rather than a whole week's, and lets the time budget
+    be checked between days.
+    Days are solved with SciPy's linear_sum_assignment (a requirement);
+    the pure-Python min-cost flow is a fallback for installs without SciPy
+    and is far slower, so large runs there may hit the time budget. Days left when
+    the time budget runs out are filled greedily, and the result is marked
+    incomplete. The other constraints are
+    checked as solved pairs are applied; a pair that breaks one is filled
+    greedily instead.
+    """
+
+    PREFERENCE_PENALTY = 1
+
+    def __init__(self, time_budget=10.0, backend=None):
+        self.time_budget = time_budget
+        self.backend = backend  # 'scipy', 'flow' or None for the best available
+
+    def generate_schedule(self, staff, shifts, start_date, end_date, preferences=None, constraints=None,
+                          time_budget=None):
+        """time_budget (seconds) overrides the instance's for this run"""
+        preferences = self._load_preferences(staff, preferences)
+        eligibility = self._build_eligibility(staff, preferences)
+        rules = self._compile_constraints(staff, preferences, eligibility, constraints)
+        state = self._reset_assignments(staff, shifts, rules)
+        backend = self._select_backend()
+        deadline = self._deadline(self.time_budget if time_budget is None else time_budget)
+
+        # Group shifts by the day they start
+        days = {}
+        for shift in sorted(shifts, key=lambda x: getattr(x, 'start_time', datetime.min)):
+            if hasattr(shift, 'start_time'):
+                days.setdefault(shift.start_time.date(), []).append(shift)
+
+        max_hours = self._max_hours(staff, preferences)
+        type_costs = {}
+        days_solved = 0
+
+        for day_shifts in days.values():
+            pending = []
+            if not self._expired(deadline):
+                # Hours already in the week (earlier days, or carried from an earlier window) come off the cap
+                room = max_hours - state.hours_in_week(day_shifts[0])
+                pairs, pending = self._solve_day(staff, day_shifts, eligibility, preferences,
+                                                 type_costs, state.shift_counts, room, backend, deadline)
+                # The flow solver stops at the deadline, possibly part way through the day
+                if backend == 'scipy' or not self._expired(deadline):
+                    days_solved += 1
+            else:
+                pairs, pending = [], self._open_slots(day_shifts)
+
+            for shift, position in pairs:
+                if not rules.allows(state, shift, position):
+                    pending.append(shift)
+                    continue
+                state.assign(position, shift)
+
+            # Slots the solver could not place (or budget ran out) are filled greedily
+            self._greedy_fill(state, pending, rules)
+
+        state.publish()
+        return self._finish(self._create_schedule_result(state, shifts, backend, days_solved, len(days)),
+                            state, shifts, preferences, days_solved == len(days))
+
+    def _select_backend(self):
+        if self.backend:
+            return self.backend
+        return 'scipy' if linear_sum_assignment is not None else 'flow'
+
+    def _open_slots(self, shifts):
+        slots = []
+        for shift in shifts:
+            needed = getattr(shift, 'required_staff', 1) - len(getattr(shift, 'assigned_staff', []))
+            slots.extend([shift] * max(0, needed))
+        return slots
+
+    def _solve_day(self, staff, day_shifts, eligibility, preferences, type_costs, loads, room, backend, deadline):
+        """Return ([(shift, staff position)], unplaced slots) for one day"""
+        slots = self._open_slots(day_shifts)
+        if not slots or not staff:
+            return [], slots
+
+        # Cost of giving each of the day's shifts to each member, before load balancing
+        shift_costs = np.empty((len(day_shifts), len(staff)), dtype=np.int64)
+        for row, shift in enumerate(day_shifts):
+            shift_type = self._get_shift_type(shift)
+            if shift_type not in type_costs:
+                prefers = np.array([shift_type in preferences.get(p).get('preferred_shift_types', [])
+                                    for p in staff], dtype=bool)
+                type_costs[shift_type] = np.where(prefers, 0, self.PREFERENCE_PENALTY)
+            shift_costs[row] = np.where(eligibility.eligible_array(shift), type_costs[shift_type], UNASSIGNABLE)
+        rows = {id(shift): row for row, shift in enumerate(day_shifts)}
+        base = shift_costs[[rows[id(slot)] for slot in slots]]
+
+        # How many of the day's shifts each member can take within the week's hours left;
+        # nobody fills two slots of one shift, so never more than the day has
+        longest = max(self._get_shift_duration(shift) for shift in day_shifts)
+        capacity = np.clip(np.floor(room / longest), 0, len(day_shifts)).astype(np.int64)
+        capacity[(shift_costs >= UNASSIGNABLE).all(axis=0)] = 0
+        if not capacity.any():
+            return [], slots
+
+        if backend == 'scipy':
+            pairs = self._solve_scipy(base, loads, capacity)
+        else:
+            # Marginal cost of each member's k-th shift, rows k = 0..depth-1
+            ranks = np.arange(int(capacity.max()))[:, None]
+            marginal = np.where(ranks < capacity[None, :], 2 * (loads[None, :] + ranks) + 1, UNASSIGNABLE)
+            pairs = self._solve_flow(slots, base, marginal, capacity, deadline)
+
+        # A member may only fill one slot of a multi-headcount shift
+        placed, seen = [], set()
+        for row, position in pairs:
+            key = (id(slots[row]), position)
+            if key not in seen:
+                seen.add(key)
+                placed.append(row)
+        placed_rows = set(placed)
+        chosen = dict(pairs)
+        unplaced = [shift for row, shift in enumerate(slots) if row not in placed_rows]
+        return [(slots[row], chosen[row]) for row in placed], unplaced
+
+    def _solve_scipy(self, base, loads, capacity):
+        # One column per shift a member can take: column c is member positions[c]'s ranks[c]-th of the day
+        positions = np.repeat(np.arange(len(capacity)), capacity)
+        ranks = np.arange(len(positions)) - np.repeat(np.cumsum(capacity) - capacity, capacity)
+        cost = base[:, positions] + (2 * (loads[positions] + ranks) + 1)
+        rows, columns = linear_sum_assignment(cost)
+        return [(int(row), int(positions[column]))
+                for row, column in zip(rows, columns) if cost[row, column] < UNASSIGNABLE]
+
+    def _solve_flow(self, slots, base, marginal, capacity, deadline):
+        slot_count, staff_count = base.shape
+        source, sink = 0, slot_count + staff_count + 1
+        flow = _MinCostFlow(sink + 1)
+
+        slot_edges = []
+        for row in range(slot_count):
+            flow.add_edge(source, 1 + row, 1, 0)
+            for position in np.flatnonzero(base[row] < UNASSIGNABLE):
+                edge = flow.add_edge(1 + row, 1 + slot_count + position, 1, int(base[row, position]))
+                slot_edges.append((row, int(position), edge))
+        for position in range(staff_count):
+            for rank in range(int(capacity[position])):
+                flow.add_edge(1 + slot_count + position, sink, 1, int(marginal[rank, position]))
+
+        flow.solve(source, sink, slot_count, deadline)
+        return [(row, position) for row, position, edge in slot_edges if edge[1] == 0]
+
+    def _greedy_fill(self, state, slots, rules):
+        if not slots:
+            return
+        queue = AssignmentQueue(range(len(state.staff)), key=lambda position: state.shift_counts[position])
+        for shift in sorted(slots, key=lambda s: s.start_time):
+            allowed = rules.allowed(state, shift)
+            taken = queue.pop_best(
+                1,
+                accept=lambda position: allowed[position] and state.staff[position] not in shift.assigned_staff
+            )
+            for position in taken:
+                state.assign(position, shift)
+                queue.push(position)
+
+    def _get_shift_type(self, shift):
+        hour = shift.start_time.hour
+        if 6 <= hour < 14:
+            return 'morning'
+        elif 14 <= hour < 22:
+            return 'evening'
+        else:
+            return 'night'
+
+    def _get_shift_duration(self, shift):
+        if hasattr(shift, 'start_time') and hasattr(shift, 'end_time'):
+            return (shift.end_time - shift.start_time).total_seconds() / 3600
+        return getattr(shift, 'duration_hours', 8)
+
+    def _create_schedule_result(self, state, shifts, backend, days_solved, days_total):
+        summary = self._generate_summary(state)
+        summary["fairness_score"] = self._calculate_fairness_score(state.hours, state.shift_counts)
+
+        return {
+            "strategy": "Optimal Assignment",
+            "schedule": self._format_schedule(shifts),
+            "summary": summary,
+            "score": summary["fairness_score"],
+            "fairness_score": summary["fairness_score"],
+            "solver": {
+                "backend": backend,
+                "days_solved": days_solved,
+                "days_total": days_total,
+                "complete": days_solved == days_total
+            }
+        }
+
+
+class _MinCostFlow:
+    """Successive shortest paths with Dijkstra and node potentials (unit capacities)"""
+
+    def __init__(self, node_count):
+        self.graph = [[] for _ in range(node_count)]
+
+    def add_edge(self, u, v, capacity, cost):
+        edge = [v, capacity, cost, len(self.graph[v])]
+        self.graph[u].append(edge)
+        self.graph[v].append([u, 0, -cost, len(self.graph[u]) - 1])
+        return edge
+
+    def solve(self, source, sink, max_flow, deadline):
+        node_count = len(self.graph)
+        potential = [0] * node_count
+        flow = 0
+        while flow < max_flow and (deadline is None or time.monotonic() < deadline):
+            dist = [float('inf')] * node_count
+            previous = [None] * node_count
+            dist[source] = 0
+            heap = [(0, source)]
+            while heap:
+                d, u = heapq.heappop(heap)
+                if d > dist[u]:
+                    continue
+                for index, (v, capacity, cost, _) in enumerate(self.graph[u]):
+                    if capacity > 0:
+                        candidate = d + cost + potential[u] - potential[v]
+                        if candidate < dist[v]:
+                            dist[v] = candidate
+                            previous[v] = (u, index)
+                            heapq.heappush(heap, (candidate, v))
+            if dist[sink] == float('inf'):
+                break
+
+            for node in range(node_count):
+                if dist[node] < float('inf'):
+                    potential[node] += dist[node]
+
+            # Every path carries one unit: all source and sink arcs have capacity 1
+            v = sink
+            while v != source:
+                u, index = previous[v]
+                edge = self.graph[u][index]
+                edge[1] -= 1
+                self.graph[v][edge[3]][1] += 1
+                v = u
+            flow += 1
+        return flow
@@ -4,6 +4,7 @@ from .MinimizeStrategy import MinimizeDaysStrategy
 from .ShiftTypeStrategy import ShiftTypeStrategy
 from .PreferenceBasedStrategy import PreferenceBasedStrategy
 from .DayNightDistributeStrategy import DayNightDistributeStrategy
+from .OptimalStrategy import OptimalStrategy
 
 class Scheduler:
     def __init__(self):
@@ -12,16 +13,19 @@ class Scheduler:
             "minimize_days": MinimizeDaysStrategy(),
             "shift_type_optimize": ShiftTypeStrategy(),
             "preference_based": PreferenceBasedStrategy(),
-            "day_night_distribute": DayNightDistributeStrategy()
+            "day_night_distribute": DayNightDistributeStrategy(),
+            "optimal": OptimalStrategy()
         }
 
-    def generate_schedule(self, strategy_name, staff, shifts, start_date, end_date):
+    def generate_schedule(self, strategy_name, staff, shifts, start_date, end_date, preferences=None, constraints=None,
+                          time_budget=None):
         strategy = self.strategies.get(strategy_name)
         if not strategy:
             available = list(self.strategies.keys())
             raise ValueError(f"Unknown strategy: {strategy_name}. Available strategies: {available}")
         
-        return strategy.generate_schedule(staff, shifts, start_date, end_date)
+        return strategy.generate_schedule(staff, shifts, start_date, end_date, preferences=preferences,
+                                          constraints=constraints, time_budget=time_budget)
 
     def get_available_strategies(self):
         return list(self.strategies.keys())
\ No newline at end of file
@@ -1,24 +1,58 @@
 from abc import ABC, abstractmethod
 from datetime import datetime
+import time
+import numpy as np
+from .preference_snapshot import PreferenceSnapshot, DEFAULT_MAX_HOURS
+from .eligibility import EligibilityIndex
+from .assignment_state import AssignmentState
+from .constraints import ConstraintSet
+from .metrics import schedule_metrics, fairness_score, std_dev
 
 class SchedulingStrategy(ABC):  # abstract class for scheduling strategies
+    """
+    Every strategy takes an optional time_budget in seconds. When it runs
+    out the strategy stops, publishes the assignment it has so far and
+    returns it with 'complete' set to False.
+    """
     
     @abstractmethod
-    def generate_schedule(self, staff, shifts, start_date, end_date):
+    def generate_schedule(self, staff, shifts, start_date, end_date, preferences=None, constraints=None,
+                          time_budget=None):
         pass
     
-    def _reset_assignments(self, staff, shifts):
-        for person in staff:
-            if hasattr(person, 'assigned_shifts'):
-                person.assigned_shifts = []
-            if hasattr(person, 'total_hours'):
-                person.total_hours = 0
-            if hasattr(person, 'days_worked'):
-                person.days_worked = 0
-                
+    def _deadline(self, time_budget):
+        """Monotonic time the run must stop by, or None for no limit"""
+        return None if time_budget is None else time.monotonic() + time_budget
+    
+    def _expired(self, deadline):
+        return deadline is not None and time.monotonic() >= deadline
+    
+    def _load_preferences(self, staff, preferences=None):
+        """Use the caller's preference snapshot, or load one for this run"""
+        if preferences is not None:
+            return preferences
+        return PreferenceSnapshot.load(staff)
+    
+    def _build_eligibility(self, staff, preferences):
+        """Weekday, skill and shift-type feasibility for this run's staff"""
+        return EligibilityIndex(staff, preferences)
+    
+    def _compile_constraints(self, staff, preferences, eligibility, constraints=None):
+        """Bind the caller's ConstraintSet (or the default rules) to this run"""
+        if constraints is None:
+            constraints = ConstraintSet.default()
+        return constraints.compile(staff, preferences, eligibility)
+    
+    def _reset_assignments(self, staff, shifts, constraints=None):
+        """Clear the shifts and return a fresh AssignmentState for this run"""
         for shift in shifts:
-            if hasattr(shift, 'assigned_staff'):
-                shift.assigned_staff = []
+            shift.assigned_staff = []
+        return AssignmentState(staff, constraints)
+    
+    def _max_hours(self, staff, preferences):
+        """Per-position max_hours_per_week array"""
+        return np.array([preferences.get(person).get('max_hours_per_week', DEFAULT_MAX_HOURS) for person in staff],
+                        dtype=float)
     
     def _format_schedule(self, shifts):
         formatted = {}
@@ -45,8 +79,8 @@ class SchedulingStrategy(ABC):  # abstract class for scheduling strategies
             formatted[date_str].append(shift_info)
         return formatted
     
-    def _generate_summary(self, staff):
-        if not staff:
+    def _generate_summary(self, state):
+        if not state.staff:
             return {
                 "total_staff": 0,
                 "total_hours_assigned": 0,
@@ -55,18 +89,30 @@ class SchedulingStrategy(ABC):  # abstract class for scheduling strategies
                 "max_hours": 0,
                 "total_shifts_assigned": 0
             }
-            
-        total_hours = sum(getattr(person, 'total_hours', 0) for person in staff)
-        total_staff = len(staff)
-        
-        hours_list = [getattr(person, 'total_hours', 0) for person in staff]
-        shifts_list = [len(getattr(person, 'assigned_shifts', [])) for person in staff]
         
         return {
-            "total_staff": total_staff,
-            "total_hours_assigned": total_hours,
-            "average_hours_per_staff": total_hours / total_staff if total_staff > 0 else 0,
-            "min_hours": min(hours_list) if hours_list else 0,
-            "max_hours": max(hours_list) if hours_list else 0,
-            "total_shifts_assigned": sum(shifts_list)
-        }
\ No newline at end of file
+            "total_staff": len(state.staff),
+            "total_hours_assigned": float(state.hours.sum()),
+            "average_hours_per_staff": float(state.hours.mean()),
+            "min_hours": float(state.hours.min()),
+            "max_hours": float(state.hours.max()),
+            "total_shifts_assigned": int(state.shift_counts.sum())
+        }
+    
+    def _calculate_fairness_score(self, hours, shifts):
+        """Calculate fairness score (0-100)"""
+        return fairness_score(hours, shifts)
+    
+    def _calculate_std_dev(self, values):
+        """Calculate standard deviation"""
+        return std_dev(values)
+    
+    def _finish(self, result, state, shifts, preferences, complete=True):
+        """
+        Add the metrics every strategy reports (see metrics.schedule_metrics),
+        a comparable `score` (the fairness score) and the completeness flag.
+        """
+        result['metrics'] = schedule_metrics(state.staff, shifts, preferences)
+        result.setdefault('score', result['metrics']['fairness_score'])
+        result['complete'] = complete
+        return result
@@ -7,6 +7,9 @@ from .Scheduler import Scheduler
 from .schedule_client import schedule_client
 from .PreferenceBasedStrategy import PreferenceBasedStrategy
 from .DayNightDistributeStrategy import DayNightDistributeStrategy
+from .OptimalStrategy import OptimalStrategy
+from .preference_snapshot import PreferenceSnapshot
+from .shift_record import ShiftRecord
 
 __all__ = [
     'SchedulingStrategy',
@@ -16,5 +19,8 @@ __all__ = [
     'Scheduler',
     'schedule_client',
     'PreferenceBasedStrategy',
-    'DayNightDistributeStrategy'
+    'DayNightDistributeStrategy',
+    'OptimalStrategy',
+    'PreferenceSnapshot',
+    'ShiftRecord'
 ]
\ No newline at end of file
@@ -0,0 +1,72 @@
+# App/controllers/scheduling/assignment_queue.py
+import heapq
+from itertools import count
+
+
+class AssignmentQueue:
+    """
+    Indexed min-heap of staff ordered by a strategy's key function.
+
+    Keys are not updated in place. Re-pushing a member bumps its version and
+    the stale entry is dropped lazily when it reaches the top, so taking the
+    next candidate and re-keying it after an assignment are O(log staff).
+    Members must be hashable; staff objects and positions both work.
+    """
+
+    def __init__(self, members, key):
+        self._key = key
+        self._heap = []
+        self._versions = {}
+        self._counter = count()
+        for member in members:
+            self.push(member)
+
+    def push(self, member):
+        """Insert a member, or re-key it after its load changed"""
+        # The insertion counter doubles as the entry's version and tie-breaker
+        version = next(self._counter)
+        self._versions[member] = version
+        heapq.heappush(self._heap, (self._key(member), version, member))
+        self._compact()
+
+    def discard(self, member):
+        """Remove a member; its entries are skipped when they surface"""
+        if member in self._versions:
+            self._versions[member] = None
+
+    def pop_best(self, limit, accept=None):
+        """
+        Take up to `limit` members with the lowest keys that pass `accept`.
+
+        Rejected members stay queued. Taken members leave the queue until
+        the caller pushes them back with their new load.
+        """
+        taken = []
+        rejected = []
+        while self._heap and len(taken) < limit:
+            entry = heapq.heappop(self._heap)
+            member = entry[2]
+            if self._versions.get(member) != entry[1]:
+                continue  # stale entry from an earlier key
+
+            if accept is None or accept(member):
+                self._versions[member] = None
+                taken.append(member)
+            else:
+                rejected.append(entry)
+
+        for entry in rejected:
+            heapq.heappush(self._heap, entry)
+        return taken
+
+    def _compact(self):
+        """Rebuild the heap once stale entries outnumber live ones"""
+        live = len(self._versions)
+        if len(self._heap) <= 2 * live + 64:
+            return
+        self._heap = [entry for entry in self._heap
+                      if self._versions.get(entry[2]) == entry[1]]
+        heapq.heapify(self._heap)
+
+    def __len__(self):
+        return sum(1 for version in self._versions.values() if version is not None)
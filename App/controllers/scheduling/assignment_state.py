@@ -0,0 +1,157 @@
+# App/controllers/scheduling/assignment_state.py
+import numpy as np
+from sqlalchemy import inspect
+
+
+def shift_duration(shift):
+    if hasattr(shift, 'start_time') and hasattr(shift, 'end_time'):
+        return (shift.end_time - shift.start_time).total_seconds() / 3600
+    return getattr(shift, 'duration_hours', 8)
+
+
+class AssignmentState:
+    """
+    Who works what during one scheduling run, kept beside the staff objects.
+
+    Hours, shift counts and days worked are arrays indexed by staff position,
+    with a shift list and a count of shifts per ordinal day for each member,
+    so a release updates the worked days without rescanning the shifts. Hours are also
+    summed per ISO week in a [staff, week] array, so weekly limits hold over
+    horizons of any length. Strategies read
+    and update these instead of setting attributes on Staff rows, so ORM
+    instances are never modified and two runs over the same staff objects
+    cannot see each other's loads.
+
+    With compiled constraints attached, every assignment is also recorded
+    in (and every release removed from) the constraints' own arrays.
+    """
+
+    def __init__(self, staff, constraints=None):
+        self.staff = list(staff)
+        self.constraints = constraints
+        self._positions = {id(person): i for i, person in enumerate(self.staff)}
+        count = len(self.staff)
+        self.hours = np.zeros(count)
+        self.shift_counts = np.zeros(count, dtype=np.int64)
+        self.days_worked = np.zeros(count, dtype=np.int64)
+        self.shifts = [[] for _ in range(count)]
+        self.days = [{} for _ in range(count)]  # ordinal day -> shifts that day
+        self.week_hours = np.zeros((count, 0))
+        self._week_columns = {}
+        if constraints is not None:
+            constraints.seed(self)
+
+    @classmethod
+    def from_shifts(cls, staff, shifts):
+        """Rebuild the state from the shifts' assigned_staff lists"""
+        state = cls(staff)
+        for shift in shifts:
+            for person in getattr(shift, 'assigned_staff', []):
+                position = state._positions.get(id(person))
+                if position is not None:
+                    state.record(position, shift)
+        return state
+
+    def position(self, person):
+        return self._positions[id(person)]
+
+    def assign(self, position, shift):
+        """Put staff[position] on the shift"""
+        if not hasattr(shift, 'assigned_staff'):
+            shift.assigned_staff = []
+        shift.assigned_staff.append(self.staff[position])
+        self.record(position, shift)
+
+    def record(self, position, shift):
+        """Count staff[position] as working the shift without touching the shift itself"""
+        self._record(position, shift)
+        if self.constraints is not None:
+            self.constraints.record(position, shift)
+
+    def carry(self, position, hours, shift_count, days_worked, recent=()):
+        """
+        Start staff[position] with load from earlier windows of the run. The
+        recent shifts also count toward weekly hours, worked days and the
+        constraints, but are not listed as this run's shifts.
+        """
+        self.hours[position] += hours
+        self.shift_counts[position] += shift_count
+        self.days_worked[position] += days_worked
+        for shift in recent:
+            column = self.week_column(shift)
+            self.week_hours[position, column] += shift_duration(shift)
+            day = shift.start_time.toordinal()
+            self.days[position][day] = self.days[position].get(day, 0) + 1
+            if self.constraints is not None:
+                self.constraints.record(position, shift)
+
+    def release(self, position, shift):
+        """Undo record(): staff[position] no longer works the shift"""
+        duration = shift_duration(shift)
+        self.hours[position] -= duration
+        self.shift_counts[position] -= 1
+        self.shifts[position].remove(shift)
+        if hasattr(shift, 'start_time'):
+            self.week_hours[position, self.week_column(shift)] -= duration
+            day = shift.start_time.toordinal()
+            remaining = self.days[position][day] - 1
+            if remaining:
+                self.days[position][day] = remaining
+            else:
+                del self.days[position][day]
+                self.days_worked[position] -= 1
+        if self.constraints is not None:
+            self.constraints.release(position, shift)
+
+    def week_column(self, shift):
+        """Column of week_hours for the shift's ISO week, added on first use"""
+        # Ordinal day 1 is a Monday, so this numbers the same Monday-to-Sunday weeks
+        week = (shift.start_time.toordinal() - 1) // 7
+        column = self._week_columns.get(week)
+        if column is None:
+            column = len(self._week_columns)
+            self._week_columns[week] = column
+            if column == self.week_hours.shape[1]:
+                grown = np.zeros((len(self.staff), max(4, 2 * column)))
+                grown[:, :column] = self.week_hours
+                self.week_hours = grown
+        return column
+
+    def hours_in_week(self, shift):
+        """Every member's hours in the shift's week (a view into week_hours)"""
+        column = self.week_column(shift)
+        return self.week_hours[:, column]
+
+    def _record(self, position, shift):
+        duration = shift_duration(shift)
+        self.hours[position] += duration
+        self.shift_counts[position] += 1
+        self.shifts[position].append(shift)
+        if hasattr(shift, 'start_time'):
+            column = self.week_column(shift)  # may grow week_hours, so look it up first
+            self.week_hours[position, column] += duration
+            day = shift.start_time.toordinal()
+            worked = self.days[position].get(day, 0)
+            self.days[position][day] = worked + 1
+            if not worked:
+                self.days_worked[position] += 1
+
+    def has_worked_day(self, position, day):
+        """Whether staff[position] already works on ordinal day `day`"""
+        return day in self.days[position]
+
+    def publish(self):
+        """
+        Mirror the totals onto plain in-memory staff objects for callers that
+        read assigned_shifts / total_hours / days_worked. Mapped ORM
+        instances are left untouched.
+        """
+        for position, person in enumerate(self.staff):
+            if inspect(person, raiseerr=False) is not None:
+                continue
+            try:
+                person.assigned_shifts = list(self.shifts[position])
+                person.total_hours = float(self.hours[position])
+                person.days_worked = int(self.days_worked[position])
+            except AttributeError:
+                continue  # slotted objects without these fields
@@ -0,0 +1,110 @@
+# App/controllers/scheduling/batch_runner.py
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+_worker_apps = {}
+
+
+def partition_staff(staff_ids, schedule_ids):
+    """Split staff into one contiguous, disjoint group per schedule"""
+    staff_ids = list(staff_ids)
+    groups = {}
+    base, extra = divmod(len(staff_ids), len(schedule_ids))
+    start = 0
+    for index, schedule_id in enumerate(schedule_ids):
+        end = start + base + (1 if index < extra else 0)
+        groups[schedule_id] = staff_ids[start:end]
+        start = end
+    return groups
+
+
+def _worker_app(database_uri, config=None):
+    """One app, and so one engine and session, per worker process and configuration"""
+    key = (database_uri, repr(sorted((config or {}).items(), key=lambda item: item[0])))
+    app = _worker_apps.get(key)
+    if app is None:
+        from App.main import create_app
+        app = create_app(dict(config or {}, SQLALCHEMY_DATABASE_URI=database_uri))
+        _worker_apps[key] = app
+    return app
+
+
+def run_schedule(database_uri, admin_id, schedule_id, staff_ids, options):
+    """
+    Auto-populate one schedule in a worker process and return plain data.
+
+    Module-level so it can be sent to the pool. The worker builds its own app
+    against database_uri and commits through its own session, so every
+    schedule is written in a separate transaction.
+    """
+    started = time.perf_counter()
+    app = _worker_app(database_uri)
+    with app.app_context():
+        from App.database import db
+        try:
+            return _populate(admin_id, schedule_id, staff_ids, options, started)
+        finally:
+            db.session.remove()
+
+
+def _populate(admin_id, schedule_id, staff_ids, options, started):
+    from App.models import Staff
+    from .schedule_client import schedule_client
+
+    staff_list = Staff.query.filter(Staff.id.in_(staff_ids)).order_by(Staff.id).all()
+    if not staff_list:
+        result = {"success": False, "message": "No staff assigned to this schedule"}
+    else:
+        result = schedule_client.auto_populate(admin_id=admin_id, schedule_id=schedule_id,
+                                               staff_list=staff_list, **options)
+    result = {key: value for key, value in result.items() if key != 'assignments'}
+    result['staff_count'] = len(staff_list)
+    result['duration_seconds'] = time.perf_counter() - started
+    return result
+
+
+class BatchScheduler:
+    """
+    Auto-populates several independent schedules at once, one per process.
+
+    Each schedule gets its own disjoint group of staff, so the runs share no
+    state and can commit in parallel. In-memory SQLite cannot be opened from
+    another process, so with that database (or when a pool cannot start)
+    the schedules run one after another in this process instead.
+    """
+
+    def __init__(self, max_workers=None):
+        self.max_workers = max_workers
+
+    def run(self, database_uri, admin_id, staff_by_schedule, options, parallel=True):
+        started = time.perf_counter()
+        results = None
+        if parallel and len(staff_by_schedule) > 1 and not self._in_memory(database_uri):
+            results = self._run_parallel(database_uri, admin_id, staff_by_schedule, options)
+        ran_parallel = results is not None
+        if results is None:
+            results = {schedule_id: _populate(admin_id, schedule_id, staff_ids, options, time.perf_counter())
+                       for schedule_id, staff_ids in staff_by_schedule.items()}
+        return {
+            "success": all(result.get('success') for result in results.values()),
+            "results": results,
+            "parallel": ran_parallel,
+            "duration_seconds": time.perf_counter() - started
+        }
+
+    def _run_parallel(self, database_uri, admin_id, staff_by_schedule, options):
+        workers = self.max_workers or min(len(staff_by_schedule), os.cpu_count() or 1)
+        try:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                futures = {schedule_id: pool.submit(run_schedule, database_uri, admin_id, schedule_id,
+                                                    staff_ids, options)
+                           for schedule_id, staff_ids in staff_by_schedule.items()}
+                return {schedule_id: future.result() for schedule_id, future in futures.items()}
+        except (OSError, BrokenProcessPool, NotImplementedError):
+            return None
+
+    @staticmethod
+    def _in_memory(database_uri):
+        return database_uri.startswith('sqlite') and (':memory:' in database_uri or database_uri == 'sqlite://')
@@ -0,0 +1,101 @@
+# App/controllers/scheduling/carry_over.py
+from datetime import timedelta
+from .preference_snapshot import staff_key
+
+
+class CarryOver:
+    """
+    Per-staff totals carried between the windows of a long scheduling run.
+
+    Hours, shift counts and distinct worked days are kept as totals, plus
+    each member's shifts from the last few days, so memory is O(staff)
+    however many windows the run spans. load() hands both to the next
+    window (see CarriedLoad), so its strategy balances against the whole
+    run and its weekly caps and other rules see the shifts just before it.
+    Before each window the staff list is also reordered so members with the
+    least carried load come first, which is the order every strategy breaks
+    ties in.
+    """
+
+    def __init__(self):
+        self.hours = {}
+        self.shifts = {}
+        self.days = {}
+        self.recent = {}
+
+    def record(self, shifts):
+        """Add one finished window's assignments to the totals"""
+        worked = {}
+        for shift in shifts:
+            duration = (shift.end_time - shift.start_time).total_seconds() / 3600
+            for person in getattr(shift, 'assigned_staff', []):
+                key = staff_key(person)
+                self.hours[key] = self.hours.get(key, 0) + duration
+                self.shifts[key] = self.shifts.get(key, 0) + 1
+                self.recent.setdefault(key, []).append(shift)
+                worked.setdefault(key, set()).add(shift.start_time.date())
+        for key, days in worked.items():
+            self.days[key] = self.days.get(key, 0) + len(days)
+
+    def load(self, window_start, lookback_days):
+        """
+        What the window starting on window_start inherits: the totals, and
+        the shifts from its ISO week's Monday or `lookback_days` before it,
+        whichever is earlier. Older shifts are dropped for good.
+        """
+        monday = window_start - timedelta(days=window_start.weekday())
+        cutoff = min(monday, window_start - timedelta(days=lookback_days))
+        for key, shifts in list(self.recent.items()):
+            kept = [shift for shift in shifts if shift.end_time.date() >= cutoff]
+            if kept:
+                self.recent[key] = kept
+            else:
+                del self.recent[key]
+        return CarriedLoad({key: (self.hours[key], self.shifts[key], self.days[key], tuple(self.recent.get(key, ())))
+                            for key in self.hours})
+
+    def order(self, staff):
+        """Staff sorted by carried hours, then days worked (stable)"""
+        return sorted(staff, key=lambda person: (self.hours.get(staff_key(person), 0),
+                                                 self.days.get(staff_key(person), 0)))
+
+    def summary(self, staff, strategy):
+        """Whole-run summary in the same shape the strategies report"""
+        hours = [self.hours.get(staff_key(person), 0) for person in staff]
+        shift_counts = [self.shifts.get(staff_key(person), 0) for person in staff]
+        total_hours = sum(hours)
+        return {
+            "total_staff": len(staff),
+            "staff_with_assignments": sum(1 for count in shift_counts if count > 0),
+            "total_hours_assigned": total_hours,
+            "average_hours_per_staff": total_hours / len(staff) if staff else 0,
+            "min_hours": min(hours) if hours else 0,
+            "max_hours": max(hours) if hours else 0,
+            "total_shifts_assigned": sum(shift_counts),
+            "min_shifts": min(shift_counts) if shift_counts else 0,
+            "max_shifts": max(shift_counts) if shift_counts else 0,
+            "average_days_per_staff": sum(self.days.values()) / len(staff) if staff else 0,
+            "fairness_score": strategy._calculate_fairness_score(hours, shift_counts)
+        }
+
+
+class CarriedLoad:
+    """
+    One window's inheritance from a CarryOver, keyed by staff. Attached to
+    the window's ConstraintSet, it seeds every AssignmentState built with
+    the compiled rules: hours, shift counts and days worked start from the
+    run's totals, and the recent shifts count toward weekly hours, worked
+    days and every rule's arrays.
+    """
+
+    def __init__(self, entries):
+        self.entries = entries  # staff key -> (hours, shifts, days worked, recent shifts)
+
+    def __bool__(self):
+        return bool(self.entries)
+
+    def seed(self, state):
+        for position, person in enumerate(state.staff):
+            entry = self.entries.get(staff_key(person))
+            if entry is not None:
+                state.carry(position, *entry)
@@ -0,0 +1,117 @@
+# App/controllers/scheduling/compare_engine.py
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from .result_cache import ResultCache
+
+
+class StaffRecord:
+    """Picklable stand-in for a Staff row, carrying only what strategies read"""
+
+    __slots__ = ('id', 'username')
+
+    def __init__(self, staff_id, username):
+        self.id = staff_id
+        self.username = username
+
+    @classmethod
+    def from_staff(cls, staff):
+        return cls(getattr(staff, 'id', None), getattr(staff, 'username', 'unknown'))
+
+    def __getstate__(self):
+        return (self.id, self.username)
+
+    def __setstate__(self, state):
+        self.__init__(*state)
+
+
+def run_strategy(strategy_name, staff, preferences, start_date, end_date, shifts_per_day, shift_type,
+                 constraints=None, thresholds=None, demand=None):
+    """
+    Run one strategy end to end without touching the database.
+
+    Module-level so it can be sent to a worker process. Returns plain data:
+    the summary, score and assignment dicts, or an error message.
+    """
+    from .schedule_client import ScheduleClient
+
+    client = ScheduleClient()
+    started = time.perf_counter()
+    try:
+        result, shifts = client._run_pipeline(strategy_name, staff, start_date, end_date,
+                                              shifts_per_day, shift_type, preferences, constraints,
+                                              demand=demand)
+        summary = result.get('summary', {})
+        client._validate_schedule_results(summary, client._staff_to_fill(staff, demand, start_date, end_date),
+                                          thresholds)
+    except Exception as e:
+        return {'error': str(e), 'duration_seconds': time.perf_counter() - started}
+
+    assignments = client._get_assignments_list(shifts)
+    return {
+        'summary': summary,
+        'score': result.get('score', 0),
+        'metrics': result.get('metrics'),
+        'assignments': assignments,
+        'assignments_count': len(assignments),
+        'duration_seconds': time.perf_counter() - started
+    }
+
+
+class CompareEngine:
+    """
+    Runs several strategies as in-memory dry runs and ranks them by score.
+
+    Every strategy gets the same StaffRecord list and preference snapshot, and
+    the runs go to a process pool so the comparison takes about as long as
+    the slowest strategy. If the pool cannot start (for example in a
+    restricted sandbox) the runs fall back to this process one after another.
+    With a ResultCache, strategies already run on the same inputs are answered
+    from it and only the rest are dispatched.
+    """
+
+    def __init__(self, max_workers=None):
+        self.max_workers = max_workers
+
+    def compare(self, strategy_names, staff, preferences, start_date, end_date, shifts_per_day=2,
+                shift_type='mixed', parallel=True, cache=None, constraints=None, thresholds=None, demand=None):
+        records = [StaffRecord.from_staff(person) for person in staff]
+        args = (records, preferences, start_date, end_date, shifts_per_day, shift_type, constraints, thresholds,
+                demand)
+
+        keys, results = {}, {}
+        if cache is not None:
+            for name in strategy_names:
+                keys[name] = ResultCache.key('compare', name, records, preferences, start_date, end_date,
+                                             shifts_per_day, shift_type, (constraints, thresholds, demand))
+                cached = cache.get(keys[name])
+                if cached is not None:
+                    results[name] = dict(cached, cached=True)
+        pending = [name for name in strategy_names if name not in results]
+
+        fresh = None
+        if parallel and len(pending) > 1:
+            fresh = self._run_parallel(pending, args)
+        if fresh is None:
+            fresh = {name: run_strategy(name, *args) for name in pending}
+        for name, result in fresh.items():
+            if cache is not None and 'error' not in result:
+                cache.put(keys[name], result)
+        results.update(fresh)
+        results = {name: results[name] for name in strategy_names}
+
+        best_strategy, best_score = None, None
+        for name in strategy_names:
+            score = results[name].get('score')
+            if 'error' not in results[name] and (best_score is None or score > best_score):
+                best_strategy, best_score = name, score
+        return results, best_strategy
+
+    def _run_parallel(self, strategy_names, args):
+        workers = self.max_workers or len(strategy_names)
+        try:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                futures = {name: pool.submit(run_strategy, name, *args) for name in strategy_names}
+                return {name: future.result() for name, future in futures.items()}
+        except (OSError, BrokenProcessPool, NotImplementedError):
+            return None
@@ -0,0 +1,366 @@
+# App/controllers/scheduling/constraints.py
+from datetime import timedelta
+import numpy as np
+from .preference_snapshot import DEFAULT_MAX_HOURS
+from .assignment_state import shift_duration
+
+# Sanity thresholds a finished schedule must meet (see validate_summary)
+DEFAULT_VALIDATION = {
+    'max_hours_spread': 20,       # most minus fewest hours
+    'max_hours_to_average': 1.5,  # most hours over the average
+    'min_shifts_per_staff': 1     # total shifts over staff count
+}
+
+
+def is_night(shift):
+    hour = shift.start_time.hour
+    return hour >= 22 or hour < 6
+
+
+class Constraint:
+    """
+    A scheduling rule, declared once and shared by every strategy, the
+    local search and the re-planner.
+
+    compile() binds the rule to one run's staff and returns an object with
+    allowed(state, shift), a boolean array over staff positions (or None
+    when the rule does not apply), allows(state, shift, position) for one
+    member, and record/release(position, shift), called as assignments are
+    made and undone. Rules keep their own per-staff arrays so a check is a
+    few vector operations however many candidates a strategy then looks at.
+    The arrays hold every recorded shift, not just the latest, so shifts
+    may be assigned in any order.
+    """
+
+    # Days either side of a shift whose shifts can decide whether it is allowed
+    lookback_days = 1
+
+    def compile(self, staff, preferences):
+        raise NotImplementedError
+
+    def __repr__(self):
+        args = ', '.join(f"{key}={value!r}" for key, value in sorted(vars(self).items()))
+        return f"{type(self).__name__}({args})"
+
+    def __eq__(self, other):
+        return type(self) is type(other) and vars(self) == vars(other)
+
+    def __hash__(self):
+        return hash(repr(self))
+
+
+class MaxHours(Constraint):
+    """Hours in each ISO week stay within the member's max_hours_per_week"""
+
+    def compile(self, staff, preferences):
+        return _CompiledMaxHours(np.array(
+            [preferences.get(person).get('max_hours_per_week', DEFAULT_MAX_HOURS) for person in staff],
+            dtype=float))
+
+
+class NoOverlap(Constraint):
+    """Nobody works two shifts that overlap in time"""
+
+    def compile(self, staff, preferences):
+        return _CompiledNoOverlap(len(staff))
+
+
+class MinRestHours(Constraint):
+    """At least `hours` off between the end of one shift and the start of the next"""
+
+    def __init__(self, hours):
+        self.hours = hours
+
+    @property
+    def lookback_days(self):
+        return 1 + int(-(-self.hours // 24))
+
+    def compile(self, staff, preferences):
+        return _CompiledNoOverlap(len(staff), self.hours * 3600)
+
+
+class MaxConsecutiveDays(Constraint):
+    """No more than `days` calendar days worked in a row"""
+
+    def __init__(self, days):
+        self.days = days
+
+    @property
+    def lookback_days(self):
+        return self.days
+
+    def compile(self, staff, preferences):
+        return _CompiledConsecutiveDays(len(staff), self.days)
+
+
+class MaxNightsPerWeek(Constraint):
+    """No more than `nights` night shifts (starting 22:00-06:00) per ISO week"""
+
+    def __init__(self, nights):
+        self.nights = nights
+
+    def compile(self, staff, preferences):
+        return _CompiledNights(len(staff), self.nights)
+
+
+class _CompiledMaxHours:
+    def __init__(self, cap):
+        self.cap = cap
+
+    def allowed(self, state, shift):
+        return state.hours_in_week(shift) + shift_duration(shift) <= self.cap
+
+    def allows(self, state, shift, position):
+        return state.hours_in_week(shift)[position] + shift_duration(shift) <= self.cap[position]
+
+    def record(self, position, shift):
+        pass  # reads the state's weekly hours
+
+    release = record
+
+
+class _CompiledNoOverlap:
+    """
+    How many shifts each member has in every assigned start/end window,
+    indexed by start day. With `gap` seconds set, shifts closer than that
+    also conflict, which is how MinRestHours compiles. Shifts are at most a
+    day long, so only windows starting within a day (plus the gap) either
+    side can conflict.
+    """
+
+    def __init__(self, count, gap=0):
+        self.count = count
+        self.gap = timedelta(seconds=gap)
+        self.reach = 1 + -(-int(gap) // 86400)
+        self.busy = {}
+        self.windows_by_day = {}
+
+    def _conflicts(self, shift):
+        day = shift.start_time.toordinal()
+        for window_day in range(day - self.reach, day + self.reach + 1):
+            for start, end in self.windows_by_day.get(window_day, ()):
+                if start < shift.end_time + self.gap and shift.start_time < end + self.gap:
+                    yield self.busy[(start, end)]
+
+    def allowed(self, state, shift):
+        taken = None
+        for busy in self._conflicts(shift):
+            taken = busy > 0 if taken is None else taken | (busy > 0)
+        return None if taken is None else ~taken
+
+    def allows(self, state, shift, position):
+        return not any(busy[position] for busy in self._conflicts(shift))
+
+    def record(self, position, shift):
+        window = (shift.start_time, shift.end_time)
+        busy = self.busy.get(window)
+        if busy is None:
+            busy = self.busy[window] = np.zeros(self.count, dtype=np.int64)
+            self.windows_by_day.setdefault(shift.start_time.toordinal(), []).append(window)
+        busy[position] += 1
+
+    def release(self, position, shift):
+        self.busy[(shift.start_time, shift.end_time)][position] -= 1
+
+
+class _CompiledConsecutiveDays:
+    """Shifts per member per ordinal day; a new day may not join runs longer than the limit"""
+
+    def __init__(self, count, limit):
+        self.count = count
+        self.limit = limit
+        self.worked = {}
+
+    def _run(self, days, alive):
+        """Days in a row worked from `days` onwards, for the members in `alive`"""
+        run = np.zeros(len(alive), dtype=np.int64)
+        for day in days:
+            worked = self.worked.get(day)
+            if worked is None:
+                break
+            alive = alive & (worked > 0)
+            if not alive.any():
+                break
+            run += alive
+        return run
+
+    def allowed(self, state, shift):
+        day = shift.start_time.toordinal()
+        everyone = np.ones(self.count, dtype=bool)
+        before = self._run(range(day - 1, day - self.limit - 1, -1), everyone)
+        after = self._run(range(day + 1, day + self.limit + 1), everyone)
+        worked = self.worked.get(day)
+        allowed = before + 1 + after <= self.limit
+        return allowed if worked is None else allowed | (worked > 0)
+
+    def allows(self, state, shift, position):
+        day = shift.start_time.toordinal()
+        if self._works(position, day):
+            return True
+        run = 1
+        for step in (-1, 1):
+            other = day + step
+            while self._works(position, other) and run <= self.limit:
+                run += 1
+                other += step
+        return run <= self.limit
+
+    def _works(self, position, day):
+        worked = self.worked.get(day)
+        return worked is not None and worked[position] > 0
+
+    def record(self, position, shift):
+        day = shift.start_time.toordinal()
+        worked = self.worked.get(day)
+        if worked is None:
+            worked = self.worked[day] = np.zeros(self.count, dtype=np.int64)
+        worked[position] += 1
+
+    def release(self, position, shift):
+        self.worked[shift.start_time.toordinal()][position] -= 1
+
+
+class _CompiledNights:
+    """Night shifts per member per ISO week"""
+
+    def __init__(self, count, limit):
+        self.count = count
+        self.limit = limit
+        self.nights = {}
+
+    def allowed(self, state, shift):
+        if not is_night(shift):
+            return None
+        nights = self.nights.get(self._week(shift))
+        return None if nights is None else nights < self.limit
+
+    def allows(self, state, shift, position):
+        if not is_night(shift):
+            return True
+        nights = self.nights.get(self._week(shift))
+        return nights is None or nights[position] < self.limit
+
+    def record(self, position, shift):
+        if is_night(shift):
+            week = self._week(shift)
+            nights = self.nights.get(week)
+            if nights is None:
+                nights = self.nights[week] = np.zeros(self.count, dtype=np.int64)
+            nights[position] += 1
+
+    def release(self, position, shift):
+        if is_night(shift):
+            self.nights[self._week(shift)][position] -= 1
+
+    @staticmethod
+    def _week(shift):
+        year, week = shift.start_time.isocalendar()[:2]
+        return year * 100 + week
+
+
+class ConstraintSet:
+    """
+    The rules a run enforces, on top of the availability and skill checks
+    already compiled into the EligibilityIndex bitsets.
+
+    A set carrying a CarriedLoad (one window of a longer run) seeds every
+    AssignmentState built with its compiled rules from that load.
+    """
+
+    def __init__(self, rules=(), carried=None):
+        self.rules = tuple(rules)
+        self.carried = carried
+
+    @classmethod
+    def default(cls):
+        return cls([MaxHours(), NoOverlap()])
+
+    @classmethod
+    def from_config(cls, config):
+        """Default rules plus the optional ones set in a SCHEDULE_CONSTRAINTS dict"""
+        rules = [MaxHours(), NoOverlap()]
+        config = config or {}
+        if config.get('min_rest_hours'):
+            rules.append(MinRestHours(config['min_rest_hours']))
+        if config.get('max_consecutive_days'):
+            rules.append(MaxConsecutiveDays(config['max_consecutive_days']))
+        if config.get('max_nights_per_week'):
+            rules.append(MaxNightsPerWeek(config['max_nights_per_week']))
+        return cls(rules)
+
+    def lookback_days(self):
+        """Days either side of a shift that can decide what the rules allow, ISO weeks aside"""
+        return max((rule.lookback_days for rule in self.rules), default=0)
+
+    def without(self, rule_type):
+        return ConstraintSet((rule for rule in self.rules if not isinstance(rule, rule_type)), self.carried)
+
+    def carrying(self, carried):
+        """The same rules, seeded with load carried from earlier windows"""
+        return ConstraintSet(self.rules, carried)
+
+    def compile(self, staff, preferences, eligibility):
+        return CompiledConstraints(eligibility, [rule.compile(staff, preferences) for rule in self.rules],
+                                   self.carried)
+
+    def __repr__(self):
+        return f"ConstraintSet({list(self.rules)!r})"
+
+    def __eq__(self, other):
+        return isinstance(other, ConstraintSet) and (self.rules, self.carried) == (other.rules, other.carried)
+
+
+class CompiledConstraints:
+    """Every rule of a ConstraintSet bound to one run"""
+
+    def __init__(self, eligibility, compiled, carried=None):
+        self.eligibility = eligibility
+        self.compiled = compiled
+        self.carried = carried
+
+    def seed(self, state):
+        """Called by a new AssignmentState: start it from the carried load, if any"""
+        if self.carried:
+            self.carried.seed(state)
+
+    def allowed(self, state, shift, shift_type=None):
+        """Staff positions that may take the shift now, as a fresh boolean array"""
+        allowed = self.eligibility.eligible_array(shift, shift_type).copy()
+        for rule in self.compiled:
+            mask = rule.allowed(state, shift)
+            if mask is not None:
+                allowed &= mask
+        return allowed
+
+    def allows(self, state, shift, position, shift_type=None):
+        """Whether staff[position] may take the shift now"""
+        if not self.eligibility.eligible_array(shift, shift_type)[position]:
+            return False
+        return all(rule.allows(state, shift, position) for rule in self.compiled)
+
+    def record(self, position, shift):
+        for rule in self.compiled:
+            rule.record(position, shift)
+
+    def release(self, position, shift):
+        """Undo record() for an assignment that is taken away"""
+        for rule in self.compiled:
+            rule.release(position, shift)
+
+
+def validate_summary(summary, staff_count, thresholds=None):
+    """Raise ValueError if a schedule summary breaks the validation thresholds"""
+    thresholds = dict(DEFAULT_VALIDATION, **(thresholds or {}))
+
+    # Check for extreme imbalances
+    if summary.get('max_hours', 0) - summary.get('min_hours', 0) > thresholds['max_hours_spread']:
+        raise ValueError(f"Schedule too unbalanced - hour difference exceeds "
+                         f"{thresholds['max_hours_spread']} hours")
+
+    # Check if all staff got reasonable assignments
+    if summary.get('total_shifts_assigned', 0) < staff_count * thresholds['min_shifts_per_staff']:
+        raise ValueError("Not enough shifts assigned - some staff may have no shifts")
+
+    # Check for reasonable distribution
+    if summary.get('max_hours', 0) > summary.get('average_hours_per_staff', 0) * thresholds['max_hours_to_average']:
+        raise ValueError("Schedule distribution too uneven")
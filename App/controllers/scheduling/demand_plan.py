@@ -0,0 +1,96 @@
+# App/controllers/scheduling/demand_plan.py
+from datetime import date, time
+import numpy as np
+from .shift_record import ShiftRecord
+
+# Hours each shift type covers unless a demand row overrides them; these
+# match the shifts auto_populate generates without a demand profile
+DEFAULT_SHIFT_TIMES = {
+    'morning': (time(8, 0), time(16, 0)),
+    'evening': (time(16, 0), time(23, 59)),
+    'night': (time(22, 0), time(6, 0)),
+}
+
+_UNIX_EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+
+def _seconds(moment):
+    return moment.hour * 3600 + moment.minute * 60 + moment.second
+
+
+class DemandPlan:
+    """
+    A schedule's demand profile as plain arrays, one entry per row.
+
+    expand() turns it into shift slots for a date range in one vectorised
+    step: every day is matched against every row's weekday at once, and the
+    slot times are built as datetime64 arrays. Each row becomes one
+    ShiftRecord per matching day, with required_staff set to the row's
+    headcount and required_skills to its skill, so the strategies fill a
+    whole multi-headcount slot in one pass. The plan is plain data, so it
+    can be pickled to worker processes and its repr keys the result cache.
+    """
+
+    def __init__(self, rows=()):
+        # (weekday, shift_type, skill, headcount, start seconds, end seconds)
+        self.rows = tuple(sorted(rows, key=lambda row: (row[0], row[4], row[1], row[2] or '')))
+
+    @classmethod
+    def load(cls, schedule_id):
+        """The schedule's DemandProfile rows in one query; an empty plan if it has none"""
+        from App.models import DemandProfile
+
+        if schedule_id is None:
+            return cls()
+        rows = []
+        for demand in DemandProfile.query.filter_by(schedule_id=schedule_id).all():
+            default_start, default_end = DEFAULT_SHIFT_TIMES[demand.shift_type]
+            rows.append((demand.weekday, demand.shift_type, demand.skill, demand.headcount,
+                         _seconds(demand.start_time or default_start), _seconds(demand.end_time or default_end)))
+        return cls(rows)
+
+    def __bool__(self):
+        return bool(self.rows)
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __repr__(self):
+        return f"DemandPlan({list(self.rows)!r})"
+
+    def __eq__(self, other):
+        return isinstance(other, DemandPlan) and self.rows == other.rows
+
+    def seats(self, start_date, end_date):
+        """Total headcount the plan asks for from start_date to end_date inclusive"""
+        if not self.rows or start_date > end_date:
+            return 0
+        days = np.arange(start_date.toordinal(), end_date.toordinal() + 1, dtype=np.int64)
+        days_per_weekday = np.bincount((days - 1) % 7, minlength=7)
+        return int(sum(days_per_weekday[row[0]] * row[3] for row in self.rows))
+
+    def expand(self, start_date, end_date):
+        """Shift slots from start_date to end_date inclusive, in start-time order"""
+        if not self.rows or start_date > end_date:
+            return []
+        weekday, shift_type, skill, headcount, start_seconds, end_seconds = (np.array(column, dtype=object)
+                                                                             for column in zip(*self.rows))
+        weekday = weekday.astype(np.int64)
+        start_seconds = start_seconds.astype(np.int64)
+        end_seconds = end_seconds.astype(np.int64)
+
+        days = np.arange(start_date.toordinal(), end_date.toordinal() + 1, dtype=np.int64)
+        # Ordinal day 1 is a Monday, so (ordinal - 1) % 7 is the weekday
+        day_index, row_index = np.nonzero(((days - 1) % 7)[:, None] == weekday[None, :])
+
+        midnight = (days[day_index] - _UNIX_EPOCH_ORDINAL) * 86400
+        starts = midnight + start_seconds[row_index]
+        # A shift ending at or before its start time runs past midnight
+        ends = midnight + end_seconds[row_index] + np.where(
+            end_seconds[row_index] <= start_seconds[row_index], 86400, 0)
+        start_times = starts.astype('datetime64[s]').astype(object)
+        end_times = ends.astype('datetime64[s]').astype(object)
+
+        return [ShiftRecord(start_times[i], end_times[i], shift_type[row], int(headcount[row]),
+                            (skill[row],) if skill[row] else ())
+                for i, row in enumerate(row_index)]
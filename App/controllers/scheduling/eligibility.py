@@ -0,0 +1,94 @@
+# App/controllers/scheduling/eligibility.py
+import numpy as np
+
+
+class EligibilityIndex:
+    """
+    Staff x shift feasibility, built once per scheduling run.
+
+    Every weekday, skill and preferred shift type maps to a packed bitset over
+    staff positions (bit i is staff[i]). A shift resolves to its eligible staff
+    with a few bitwise ANDs, and the result is cached per distinct
+    (weekday, required skills, shift type) combination.
+    """
+
+    def __init__(self, staff, preferences):
+        self.staff = list(staff)
+        self._positions = {id(person): i for i, person in enumerate(self.staff)}
+        everyone = (1 << len(self.staff)) - 1
+
+        self._available = [everyone] * 7
+        self._skills = {}
+        self._prefers = {}
+        for i, person in enumerate(self.staff):
+            prefs = preferences.get(person)
+            bit = 1 << i
+            for day in prefs.get('unavailable_days', []):
+                if 0 <= day <= 6:
+                    self._available[day] &= ~bit
+            for skill in prefs.get('skills', []):
+                self._skills[skill] = self._skills.get(skill, 0) | bit
+            for shift_type in prefs.get('preferred_shift_types', []):
+                self._prefers[shift_type] = self._prefers.get(shift_type, 0) | bit
+
+        self._masks = {}
+        self._arrays = {}
+
+    def eligible(self, shift, shift_type=None):
+        """
+        Bitset of staff available on the shift's weekday with all its required
+        skills, optionally limited to staff who prefer `shift_type`.
+        """
+        if not hasattr(shift, 'start_time'):
+            return 0
+
+        key = self._key(shift, shift_type)
+        mask = self._masks.get(key)
+        if mask is None:
+            weekday, skills, preferred = key
+            mask = self._available[weekday]
+            for skill in skills:
+                mask &= self._skills.get(skill, 0)
+            if preferred is not None:
+                mask &= self._prefers.get(preferred, 0)
+            self._masks[key] = mask
+        return mask
+
+    def eligible_array(self, shift, shift_type=None):
+        """Eligible staff as a NumPy boolean array indexed by staff position"""
+        key = self._key(shift, shift_type) if hasattr(shift, 'start_time') else None
+        array = self._arrays.get(key)
+        if array is None:
+            array = self.to_array(self.eligible(shift, shift_type))
+            self._arrays[key] = array
+        return array
+
+    def can_work(self, person, shift, shift_type=None):
+        """O(1) membership test against the shift's cached eligibility array"""
+        position = self._positions.get(id(person))
+        if position is None:
+            return False
+        return bool(self.eligible_array(shift, shift_type)[position])
+
+    def staff_preferring(self, shift_type):
+        """Staff who list `shift_type` among their preferred shift types"""
+        return self.members(self._prefers.get(shift_type, 0))
+
+    def position(self, person):
+        return self._positions[id(person)]
+
+    def members(self, mask):
+        """Staff objects whose bit is set in `mask`"""
+        return [person for person, allowed in zip(self.staff, self.to_array(mask)) if allowed]
+
+    def to_array(self, mask):
+        count = len(self.staff)
+        if count == 0:
+            return np.zeros(0, dtype=bool)
+        packed = np.frombuffer(mask.to_bytes((count + 7) // 8, 'little'), dtype=np.uint8)
+        return np.unpackbits(packed, bitorder='little')[:count].astype(bool)
+
+    @staticmethod
+    def _key(shift, shift_type):
+        skills = tuple(sorted(getattr(shift, 'required_skills', None) or []))
+        return (shift.start_time.weekday(), skills, shift_type)
@@ -0,0 +1,169 @@
+# App/controllers/scheduling/job_queue.py
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime, date
+import multiprocessing
+import threading
+from sqlalchemy import update
+from App.models import SchedulingJob, Staff
+from App.database import db
+from .batch_runner import BatchScheduler, _worker_app
+
+DEFAULT_JOB_WORKERS = 2
+
+
+def run_job(database_uri, config, job_id):
+    """
+    Run one queued job in a worker process.
+
+    Module-level so it can be sent to the pool. The worker builds its own app
+    against database_uri with the scheduling settings it was given, and
+    records the outcome on the job row itself.
+    """
+    _run_job(_worker_app(database_uri, config), job_id)
+
+
+def _run_job(app, job_id):
+    from .schedule_client import schedule_client
+
+    with app.app_context():
+        job = db.session.get(SchedulingJob, job_id)
+        if job is None:
+            return
+        job.status = 'running'
+        job.started_at = datetime.utcnow()
+        db.session.commit()
+
+        params = dict(job.params or {})
+        try:
+            staff_list = Staff.query.filter(Staff.id.in_(params.pop('staff_ids'))).all()
+            for key in ('start_date', 'end_date'):
+                params[key] = date.fromisoformat(params[key])
+            result = schedule_client.auto_populate(
+                admin_id=job.created_by,
+                schedule_id=job.schedule_id,
+                staff_list=staff_list,
+                progress=lambda stage, fraction: _report(job_id, stage, fraction),
+                **params
+            )
+        except Exception as e:
+            db.session.rollback()
+            result = {"success": False, "message": str(e)}
+
+        job = db.session.get(SchedulingJob, job_id)
+        if result.get('success'):
+            job.status = 'succeeded'
+            job.progress = 1.0
+            job.result = _job_result(result)
+        else:
+            job.status = 'failed'
+            job.error = result.get('message', 'Auto-population failed')
+        job.finished_at = datetime.utcnow()
+        db.session.commit()
+        db.session.remove()
+
+
+def _report(job_id, stage, fraction):
+    # Through a connection of its own: committing the run's session here would
+    # commit its pending delete early and expire every loaded staff row
+    with db.engine.begin() as connection:
+        connection.execute(update(SchedulingJob.__table__)
+                           .where(SchedulingJob.__table__.c.id == job_id)
+                           .values(stage=stage, progress=float(fraction)))
+
+
+def _job_result(result):
+    """The JSON-safe part of an auto-populate result; assignments are left in the shift table"""
+    job_result = {key: value for key, value in result.items() if key != 'assignments'}
+    job_result['assignments_count'] = len(result.get('assignments', []))
+    return job_result
+
+
+class JobQueue:
+    """
+    Runs auto-populate requests in the background and records them in the
+    scheduling_job table.
+
+    submit() stores the job as queued and returns straight away; a small pool
+    of worker processes then runs it against its own app, writing the stage
+    and progress fraction to the row as the run advances, and finally the
+    result or the error. The run is CPU-bound, so it must not share a
+    process with a gevent web worker. Because state lives in the table, any
+    web worker can answer a status request for any job.
+
+    In-memory SQLite cannot be opened from another process, so with that
+    database (or when a pool cannot start) jobs run on a thread instead.
+    """
+
+    def __init__(self, max_workers=None):
+        self.max_workers = max_workers
+        self._executor = None
+        self._threads = None
+        self._lock = threading.Lock()
+
+    def submit(self, app, admin_id, schedule_id, params):
+        """Queue an auto-populate run and return its SchedulingJob row"""
+        job = SchedulingJob(schedule_id=schedule_id, created_by=admin_id, params=params,
+                            status='queued', progress=0.0)
+        db.session.add(job)
+        db.session.commit()
+        if not self._submit_process(app, job.id):
+            self._thread_pool(app).submit(_run_job, app, job.id)
+        return job
+
+    def get(self, job_id):
+        return db.session.get(SchedulingJob, job_id)
+
+    def _workers(self, app):
+        return self.max_workers or app.config.get('SCHEDULING_JOB_WORKERS', DEFAULT_JOB_WORKERS)
+
+    def _submit_process(self, app, job_id):
+        database_uri = app.config['SQLALCHEMY_DATABASE_URI']
+        if BatchScheduler._in_memory(database_uri):
+            return False
+        config = {key: value for key, value in app.config.items() if key.startswith('SCHEDUL')}
+        try:
+            future = self._process_pool(app).submit(run_job, database_uri, config, job_id)
+        except (OSError, BrokenProcessPool, NotImplementedError, RuntimeError):
+            self._discard_pool()
+            return False
+        future.add_done_callback(lambda future: self._finished(app, job_id, future))
+        return True
+
+    def _process_pool(self, app):
+        with self._lock:
+            if self._executor is None:
+                # Spawned rather than forked: a gevent worker's patched state must not leak into the pool
+                self._executor = ProcessPoolExecutor(max_workers=self._workers(app),
+                                                     mp_context=multiprocessing.get_context('spawn'))
+            return self._executor
+
+    def _thread_pool(self, app):
+        with self._lock:
+            if self._threads is None:
+                self._threads = ThreadPoolExecutor(max_workers=self._workers(app),
+                                                   thread_name_prefix='scheduling-job')
+            return self._threads
+
+    def _discard_pool(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False)
+
+    def _finished(self, app, job_id, future):
+        """Fail a job whose worker died before it could record an outcome"""
+        if future.cancelled() or future.exception() is None:
+            return
+        if isinstance(future.exception(), BrokenProcessPool):
+            self._discard_pool()
+        with app.app_context():
+            with db.engine.begin() as connection:
+                connection.execute(update(SchedulingJob.__table__)
+                                   .where(SchedulingJob.__table__.c.id == job_id,
+                                          SchedulingJob.__table__.c.status.in_(('queued', 'running')))
+                                   .values(status='failed', error=f"Worker stopped: {future.exception()}",
+                                           finished_at=datetime.utcnow()))
+
+
+job_queue = JobQueue()
@@ -0,0 +1,301 @@
+# App/controllers/scheduling/local_search.py
+import time
+import numpy as np
+from .eligibility import EligibilityIndex
+from .assignment_state import AssignmentState
+from .constraints import ConstraintSet
+
+
+class LocalSearch:
+    """
+    Tabu search over an existing assignment, run after any strategy.
+
+    The objective is the sum of squared staff hours (lower is more balanced)
+    plus `preference_weight` for every shift outside a member's preferred
+    types. Two neighbourhoods are explored: moving one assignment to another
+    member, and swapping two assignments between members. Per-staff hours
+    and preference penalties are kept as aggregates, so every candidate is
+    scored in O(1) instead of re-scoring the whole schedule. Feasibility is
+    the run's compiled ConstraintSet (the defaults unless one is given),
+    checked for the one member a move would change, and only for a
+    candidate that would beat the best found so far in the scan. A swap
+    only releases the shift a member gives up when it falls close enough
+    to the one taken on to change what the rules allow. The deadline is
+    checked as the neighbourhood is scanned, so one iteration cannot
+    overrun the budget by more than a source member's moves.
+
+    A moved assignment may not return to its previous owner for
+    `tabu_tenure` iterations unless that beats the best schedule seen.
+    The best schedule found before the time budget runs out is written back
+    onto the shifts.
+    """
+
+    def __init__(self, time_budget=1.0, preference_weight=16.0, tabu_tenure=7,
+                 candidates=5, max_stale=200):
+        self.time_budget = time_budget
+        self.preference_weight = preference_weight
+        self.tabu_tenure = tabu_tenure
+        self.candidates = candidates  # least-loaded targets tried per assignment
+        self.max_stale = max_stale  # iterations without a new best before stopping
+
+    def improve(self, staff, shifts, preferences, eligibility=None, time_budget=None, constraints=None):
+        """Improve the assignment in place and return search statistics"""
+        deadline = time.monotonic() + (self.time_budget if time_budget is None else time_budget)
+        if eligibility is None:
+            eligibility = EligibilityIndex(staff, preferences)
+        if constraints is None:
+            constraints = ConstraintSet.default()
+        rules = constraints.compile(staff, preferences, eligibility)
+        state = _SearchState(staff, shifts, preferences, eligibility, rules, self.preference_weight,
+                             constraints.lookback_days())
+
+        start_objective = best_objective = current = state.objective()
+        best_owner = state.owner.copy()
+        tabu = {}
+        iteration = stale = moves = 0
+        converged = False
+
+        while state.slot_count and stale < self.max_stale and time.monotonic() < deadline:
+            iteration += 1
+            move = self._best_move(state, tabu, iteration, current, best_objective, deadline)
+            if time.monotonic() >= deadline:
+                break  # the scan was cut short, so its best move may not be the best
+            if move is None:
+                converged = True
+                break
+
+            delta, kind, first, second = move
+            if kind == 'move':
+                tabu[(first, int(state.owner[first]))] = iteration + self.tabu_tenure
+                state.move(first, second)
+            else:
+                tabu[(first, int(state.owner[first]))] = iteration + self.tabu_tenure
+                tabu[(second, int(state.owner[second]))] = iteration + self.tabu_tenure
+                state.swap(first, second)
+            moves += 1
+
+            current += delta
+            if current < best_objective - 1e-9:
+                best_objective = current
+                best_owner = state.owner.copy()
+                stale = 0
+            else:
+                stale += 1
+
+        if best_objective < start_objective:
+            state.write_back(best_owner)
+        return {
+            "iterations": iteration,
+            "moves": moves,
+            "objective_before": float(start_objective),
+            "objective_after": float(best_objective),
+            "complete": converged or stale >= self.max_stale or not state.slot_count
+        }
+
+    def _best_move(self, state, tabu, iteration, current, best_objective, deadline):
+        """Best admissible move or swap touching the most loaded members"""
+        best = None
+
+        def improves(delta, placements):
+            """Whether a candidate would replace the best so far, before its feasibility is checked"""
+            if best is not None and delta >= best[0]:
+                return False
+            is_tabu = any(tabu.get(pair, 0) > iteration for pair in placements)
+            return not is_tabu or current + delta < best_objective - 1e-9  # tabu needs aspiration
+
+        for source in state.most_loaded(self.candidates):
+            if time.monotonic() >= deadline:
+                break
+            for slot in state.slots_of[source]:
+                targets = state.least_loaded_eligible(slot, self.candidates)
+                for target in targets:
+                    delta = state.move_delta(slot, target)
+                    if improves(delta, [(slot, target)]) and state.can_move(slot, target):
+                        best = (delta, 'move', slot, target)
+                    if target == source or not state.slots_of[target]:
+                        continue
+                    # Score every swap with the target at once, then check them cheapest first
+                    others = np.fromiter(state.slots_of[target], dtype=np.int64)
+                    deltas = state.swap_deltas(slot, others)
+                    for index in np.argsort(deltas, kind='stable'):
+                        delta, other = float(deltas[index]), int(others[index])
+                        if best is not None and delta >= best[0]:
+                            break
+                        if improves(delta, [(slot, target), (other, source)]) and state.can_swap(slot, other):
+                            best = (delta, 'swap', slot, other)
+                            break
+        return best
+
+
+class _SearchState:
+    """Assignment as an owner array with per-staff aggregates for O(1) deltas"""
+
+    def __init__(self, staff, shifts, preferences, eligibility, rules, preference_weight, lookback_days=0):
+        self.staff = list(staff)
+        self.weight = preference_weight
+        positions = {id(person): i for i, person in enumerate(self.staff)}
+        self._positions = positions
+
+        # One slot per (shift, assigned member) pair
+        self.shifts = [shift for shift in shifts if hasattr(shift, 'start_time')]
+        slot_shift, owner = [], []
+        for index, shift in enumerate(self.shifts):
+            for person in getattr(shift, 'assigned_staff', []):
+                if id(person) in positions:
+                    slot_shift.append(index)
+                    owner.append(positions[id(person)])
+        self.slot_count = len(owner)
+        self.slot_shift = np.array(slot_shift, dtype=np.int64)
+        self.owner = np.array(owner, dtype=np.int64)
+
+        self.duration = np.array([self._duration(self.shifts[i]) for i in slot_shift])
+        self.eligible = [eligibility.eligible_array(self.shifts[i]) for i in slot_shift]
+
+        # Preference penalty of every (slot, staff) pair: 1 - prefers[slot_type[slot], position]
+        types = [self._shift_type(self.shifts[i]) for i in slot_shift]
+        names = sorted(set(types))
+        self.slot_type = np.array([names.index(t) for t in types], dtype=np.int64)
+        self.prefers = np.array([[name in preferences.get(p).get('preferred_shift_types', []) for p in self.staff]
+                                 for name in names], dtype=bool).reshape(len(names), len(self.staff))
+
+        # Aggregates; `assigned` holds what the constraints check against
+        self.rules = rules
+        self.lookback_days = lookback_days
+        self.assigned = AssignmentState(self.staff, rules)
+        self.hours = np.zeros(len(self.staff))
+        self.on_shift = set()  # (shift index, position): one seat per member per shift
+        self.slots_of = [set() for _ in self.staff]
+        self.penalty_total = 0
+        for slot in range(self.slot_count):
+            self._add(slot, int(self.owner[slot]))
+
+    # --- objective -------------------------------------------------------
+
+    def objective(self):
+        return float(np.dot(self.hours, self.hours)) + self.weight * self.penalty_total
+
+    def _penalty(self, slot, position):
+        return 0 if self.prefers[self.slot_type[slot], position] else 1
+
+    def move_delta(self, slot, target):
+        source = int(self.owner[slot])
+        d = self.duration[slot]
+        hours_delta = 2 * d * (self.hours[target] - self.hours[source] + d)
+        return hours_delta + self.weight * (self._penalty(slot, target) - self._penalty(slot, source))
+
+    def swap_deltas(self, first, others):
+        """Objective change of swapping `first` with each of `others`, all held by one member"""
+        a, b = int(self.owner[first]), int(self.owner[others[0]])
+        gain = self.duration[others] - self.duration[first]  # hours a gains, b loses
+        hours_delta = 2 * gain * (self.hours[a] - self.hours[b]) + 2 * gain * gain
+        types = self.slot_type[others]
+        penalty_delta = (self.prefers[types, b].astype(np.int64) - self.prefers[types, a] +
+                         self._penalty(first, b) - self._penalty(first, a))
+        return hours_delta + self.weight * penalty_delta
+
+    # --- feasibility -----------------------------------------------------
+
+    def can_move(self, slot, target, released=None):
+        """`released` is a slot the target gives up in the same swap"""
+        if target == self.owner[slot] or not self.eligible[slot][target]:
+            return False
+        if (int(self.slot_shift[slot]), target) in self.on_shift:
+            return False
+        shift = self._shift(slot)
+        # Giving a shift up only loosens the rules, so this settles most swaps
+        if self.rules.allows(self.assigned, shift, target):
+            return True
+        given_up = None if released is None else self._shift(released)
+        if given_up is None or not self._related(shift, given_up):
+            return False
+
+        self.assigned.release(target, given_up)
+        try:
+            return self.rules.allows(self.assigned, shift, target)
+        finally:
+            self.assigned.record(target, given_up)
+
+    def _related(self, shift, other):
+        """Whether `other` can affect what the rules allow for `shift`: same ISO week or within the look-back"""
+        first, second = shift.start_time.toordinal(), other.start_time.toordinal()
+        return (first - 1) // 7 == (second - 1) // 7 or abs(first - second) <= self.lookback_days + 1
+
+    def can_swap(self, first, second):
+        a, b = int(self.owner[first]), int(self.owner[second])
+        if a == b or self.slot_shift[first] == self.slot_shift[second]:
+            return False
+        return self.can_move(first, b, released=second) and self.can_move(second, a, released=first)
+
+    # --- neighbourhood ---------------------------------------------------
+
+    def most_loaded(self, count):
+        count = min(count, len(self.staff))
+        order = np.argpartition(-self.hours, count - 1)[:count]
+        return [int(p) for p in order[np.argsort(-self.hours[order])] if self.slots_of[p]]
+
+    def least_loaded_eligible(self, slot, count):
+        eligible = self.eligible[slot]
+        masked = np.where(eligible, self.hours, np.inf)
+        count = min(count, int(eligible.sum()))
+        if count == 0:
+            return []
+        order = np.argpartition(masked, count - 1)[:count]
+        return [int(p) for p in order[np.argsort(masked[order])]]
+
+    # --- updates ---------------------------------------------------------
+
+    def _shift(self, slot):
+        return self.shifts[int(self.slot_shift[slot])]
+
+    def _add(self, slot, position):
+        self.owner[slot] = position
+        self.hours[position] += self.duration[slot]
+        self.assigned.record(position, self._shift(slot))
+        self.on_shift.add((int(self.slot_shift[slot]), position))
+        self.slots_of[position].add(slot)
+        self.penalty_total += self._penalty(slot, position)
+
+    def _remove(self, slot):
+        position = int(self.owner[slot])
+        self.hours[position] -= self.duration[slot]
+        self.assigned.release(position, self._shift(slot))
+        self.on_shift.discard((int(self.slot_shift[slot]), position))
+        self.slots_of[position].discard(slot)
+        self.penalty_total -= self._penalty(slot, position)
+
+    def move(self, slot, target):
+        self._remove(slot)
+        self._add(slot, target)
+
+    def swap(self, first, second):
+        a, b = int(self.owner[first]), int(self.owner[second])
+        self._remove(first)
+        self._remove(second)
+        self._add(first, b)
+        self._add(second, a)
+
+    def write_back(self, owner):
+        """Rebuild the shifts' assigned_staff lists from an owner array"""
+        for shift in self.shifts:
+            # Keep anyone assigned from outside this run's staff list
+            shift.assigned_staff = [p for p in getattr(shift, 'assigned_staff', [])
+                                    if id(p) not in self._positions]
+        for slot, position in enumerate(owner):
+            self.shifts[int(self.slot_shift[slot])].assigned_staff.append(self.staff[int(position)])
+        AssignmentState.from_shifts(self.staff, self.shifts).publish()
+
+    @staticmethod
+    def _duration(shift):
+        if hasattr(shift, 'end_time'):
+            return (shift.end_time - shift.start_time).total_seconds() / 3600
+        return getattr(shift, 'duration_hours', 8)
+
+    @staticmethod
+    def _shift_type(shift):
+        hour = shift.start_time.hour
+        if 6 <= hour < 14:
+            return 'morning'
+        elif 14 <= hour < 22:
+            return 'evening'
+        else:
+            return 'night'
@@ -0,0 +1,126 @@
+# App/controllers/scheduling/metrics.py
+import numpy as np
+from .assignment_state import shift_duration
+
+# Shift types a start hour maps to, in matrix column order
+SHIFT_TYPES = ('morning', 'evening', 'night')
+
+
+def shift_type_index(hour):
+    """Column in SHIFT_TYPES for a shift starting at `hour`"""
+    if 6 <= hour < 14:
+        return 0
+    if 14 <= hour < 22:
+        return 1
+    return 2
+
+
+def fairness_score(hours, shifts):
+    """0-100: 70% how close the hour range is to zero, 30% the same for shift counts"""
+    hours = np.asarray(hours, dtype=float)
+    shifts = np.asarray(shifts, dtype=float)
+    if hours.size == 0 or hours.max() == 0:
+        return 0
+
+    hours_score = 100 * (1 - (np.ptp(hours) / hours.max()))
+    shifts_score = 100
+    if shifts.size and shifts.max() > 0:
+        shifts_score = 100 * (1 - (np.ptp(shifts) / shifts.max()))
+    return float((hours_score * 0.7) + (shifts_score * 0.3))
+
+
+def std_dev(values):
+    values = np.asarray(values, dtype=float)
+    if values.size <= 1:
+        return 0
+    return float(values.std())
+
+
+def gini(values):
+    """Gini coefficient: 0 when everyone has the same, towards 1 when one has it all"""
+    values = np.sort(np.asarray(values, dtype=float))
+    total = values.sum()
+    if values.size == 0 or total == 0:
+        return 0.0
+    n = values.size
+    return float(2 * np.dot(np.arange(1, n + 1), values) / (n * total) - (n + 1) / n)
+
+
+def distribution_score(day_shifts, night_shifts, day_staff, night_staff):
+    """0-100: how closely the day/night split of filled shifts follows the split of staff"""
+    if day_shifts + night_shifts == 0 or day_staff + night_staff == 0:
+        return 0.0
+    ideal_day_ratio = day_staff / (day_staff + night_staff)
+    actual_day_ratio = day_shifts / (day_shifts + night_shifts)
+    return max(0, 100 - (abs(ideal_day_ratio - actual_day_ratio) * 200))
+
+
+def efficiency_score(hours, days_worked):
+    """0-100: hours per working day (10 per hour, capped at 100) averaged over all staff"""
+    hours = np.asarray(hours, dtype=float)
+    days_worked = np.asarray(days_worked, dtype=float)
+    if days_worked.size == 0:
+        return 0.0
+    worked = days_worked > 0
+    return float(np.minimum(100, hours[worked] / days_worked[worked] * 10).sum() / days_worked.size)
+
+
+def schedule_metrics(staff, shifts, preferences=None):
+    """
+    Quality metrics for an assignment, computed the same way for every strategy.
+
+    The shifts' assigned_staff lists are read once into an assignment matrix
+    in coordinate form (one shift index and one staff position per
+    assignment); everything else is whole-array NumPy work:
+
+    - fairness_score: as SchedulingStrategy reports it (0-100)
+    - gini: inequality of hours across staff (0 is perfectly even)
+    - hours_variance, hours_std_dev, shifts_std_dev
+    - preference_satisfaction: % of assignments in a preferred shift type,
+      or None without a preference snapshot
+    - coverage: % of required headcount filled, over-staffing not counted
+    - day_night_balance: 100 minus the Gini of night shifts per member, so
+      100 when nights are shared evenly (and when there are none)
+    """
+    staff = list(staff)
+    positions = {id(person): i for i, person in enumerate(staff)}
+    shifts = [shift for shift in shifts if hasattr(shift, 'start_time')]
+
+    shift_rows, staff_columns = [], []
+    for row, shift in enumerate(shifts):
+        for person in getattr(shift, 'assigned_staff', None) or []:
+            position = positions.get(id(person))
+            if position is not None:
+                shift_rows.append(row)
+                staff_columns.append(position)
+    shift_rows = np.array(shift_rows, dtype=np.int64)
+    staff_columns = np.array(staff_columns, dtype=np.int64)
+
+    durations = np.array([shift_duration(shift) for shift in shifts], dtype=float)
+    types = np.array([shift_type_index(shift.start_time.hour) for shift in shifts], dtype=np.int64)
+    required = np.array([getattr(shift, 'required_staff', 1) or 1 for shift in shifts], dtype=np.int64)
+
+    hours = np.bincount(staff_columns, weights=durations[shift_rows], minlength=len(staff))
+    counts = np.bincount(staff_columns, minlength=len(staff))
+    nights = np.bincount(staff_columns[types[shift_rows] == 2], minlength=len(staff))
+    filled = np.minimum(np.bincount(shift_rows, minlength=len(shifts)), required)
+
+    satisfaction = None
+    if preferences is not None:
+        satisfaction = 0.0
+        if shift_rows.size:
+            prefers = np.array([[shift_type in preferences.get(person).get('preferred_shift_types', [])
+                                 for shift_type in SHIFT_TYPES] for person in staff], dtype=bool)
+            satisfaction = float(100 * prefers[staff_columns, types[shift_rows]].mean())
+
+    return {
+        "fairness_score": fairness_score(hours, counts),
+        "gini": gini(hours),
+        "hours_variance": float(hours.var()) if hours.size else 0.0,
+        "hours_std_dev": std_dev(hours),
+        "shifts_std_dev": std_dev(counts),
+        "preference_satisfaction": satisfaction,
+        "coverage": float(100 * filled.sum() / required.sum()) if required.size else 0.0,
+        "day_night_balance": 100 * (1 - gini(nights)),
+        "total_shifts_assigned": int(shift_rows.size)
+    }
@@ -0,0 +1,97 @@
+# App/controllers/scheduling/preference_snapshot.py
+import hashlib
+import json
+from App.models import Preferences, Staff
+
+DEFAULT_MAX_HOURS = 40
+
+# Mirrors the fallbacks on the Staff convenience properties
+DEFAULT_PREFERENCES = {
+    'preferred_shift_types': ['regular'],
+    'skills': [],
+    'unavailable_days': [],
+    'max_hours_per_week': DEFAULT_MAX_HOURS
+}
+
+
+def staff_key(person):
+    """Key a staff member by database id, or by identity for in-memory objects"""
+    staff_id = getattr(person, 'id', None)
+    return staff_id if staff_id is not None else id(person)
+
+
+class PreferenceSnapshot:
+    """
+    Read-only view of every staff member's preferences for one scheduling run.
+
+    All rows are fetched with a single query up front so strategies can look
+    preferences up per candidate without going back to the database.
+    """
+
+    def __init__(self, preferences_by_key=None):
+        self._by_key = preferences_by_key or {}
+        self._fingerprint = None
+
+    @classmethod
+    def load(cls, staff):
+        rows = {}
+        staff_ids = [s.id for s in staff if getattr(s, 'id', None) is not None]
+        if staff_ids:
+            try:
+                query = Preferences.query.filter(Preferences.staff_id.in_(staff_ids))
+                rows = {prefs.staff_id: prefs for prefs in query.all()}
+            except Exception:
+                # No app context or tables (plain in-memory runs) - use staff attributes
+                rows = {}
+
+        preferences_by_key = {}
+        for person in staff:
+            prefs = rows.get(getattr(person, 'id', None))
+            if prefs is not None:
+                preferences_by_key[staff_key(person)] = cls._from_row(prefs)
+            else:
+                preferences_by_key[staff_key(person)] = cls._from_attributes(person)
+        return cls(preferences_by_key)
+
+    @staticmethod
+    def _from_row(prefs):
+        return {
+            'preferred_shift_types': list(prefs.preferred_shift_types or DEFAULT_PREFERENCES['preferred_shift_types']),
+            'skills': list(prefs.skills or []),
+            'unavailable_days': list(prefs.unavailable_days or []),
+            'max_hours_per_week': prefs.max_hours_per_week if prefs.max_hours_per_week is not None else DEFAULT_MAX_HOURS
+        }
+
+    @staticmethod
+    def _from_attributes(person):
+        if isinstance(person, Staff):
+            # Avoid the lazy relationship load behind the Staff properties
+            return {key: (list(value) if isinstance(value, list) else value)
+                    for key, value in DEFAULT_PREFERENCES.items()}
+
+        return {
+            'preferred_shift_types': list(getattr(person, 'preferred_shift_types', None) or DEFAULT_PREFERENCES['preferred_shift_types']),
+            'skills': list(getattr(person, 'skills', None) or []),
+            'unavailable_days': list(getattr(person, 'unavailable_days', None) or []),
+            'max_hours_per_week': getattr(person, 'max_hours_per_week', DEFAULT_MAX_HOURS)
+        }
+
+    def get(self, person, default=None):
+        prefs = self._by_key.get(staff_key(person))
+        if prefs is None:
+            return default if default is not None else dict(DEFAULT_PREFERENCES)
+        return prefs
+
+    def fingerprint(self):
+        """Hash of the snapshot's contents; changes whenever any preference does"""
+        if self._fingerprint is None:
+            payload = json.dumps(sorted(self._by_key.items(), key=lambda item: str(item[0])),
+                                 sort_keys=True, default=str)
+            self._fingerprint = hashlib.sha256(payload.encode()).hexdigest()
+        return self._fingerprint
+
+    def __contains__(self, person):
+        return staff_key(person) in self._by_key
+
+    def __len__(self):
+        return len(self._by_key)
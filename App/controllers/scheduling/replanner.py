@@ -0,0 +1,160 @@
+# App/controllers/scheduling/replanner.py
+from datetime import datetime, timedelta
+import numpy as np
+from App.models import Shift, Staff
+from App.database import db
+from .preference_snapshot import PreferenceSnapshot
+from .eligibility import EligibilityIndex
+from .assignment_state import AssignmentState
+from .constraints import ConstraintSet
+
+
+class _CoverageSlot:
+    """A new shift that has no database row yet"""
+
+    def __init__(self, start_time, end_time):
+        self.start_time = start_time
+        self.end_time = end_time
+        self.staff_id = None
+        self.required_skills = []
+
+
+class Replanner:
+    """
+    Repairs a saved schedule after one change instead of regenerating it.
+
+    Supported changes:
+        {"type": "preferences", "staff_id": id}  - stored preferences changed
+        {"type": "remove_staff", "staff_id": id} - a member leaves the roster
+        {"type": "coverage", "start_time": dt, "end_time": dt, "required_staff": n}
+
+    Only the shifts the change invalidates are reassigned. The saved shifts
+    around them (their ISO weeks plus the rules' look-back days) are loaded
+    into an AssignmentState with the compiled ConstraintSet, so the work
+    scales with the change rather than with the schedule and every rule the
+    strategies enforce holds here too. Each affected shift goes to the
+    least-loaded allowed member for its week, and the diff is written as
+    row updates, inserts and deletes in one transaction.
+    """
+
+    def __init__(self, schedule_id, start_date, end_date, staff_list=None, constraints=None):
+        self.schedule_id = schedule_id
+        self.start = datetime.combine(start_date, datetime.min.time())
+        self.end = datetime.combine(end_date, datetime.max.time())
+        self.staff_list = staff_list
+        self.constraints = constraints if constraints is not None else ConstraintSet.default()
+
+    def replan(self, change):
+        change_type = change.get('type')
+        excluded = set()
+        if change_type == 'preferences':
+            affected = self._preference_violations(change['staff_id'])
+        elif change_type == 'remove_staff':
+            excluded.add(change['staff_id'])
+            affected = self._staff_shifts(change['staff_id'])
+        elif change_type == 'coverage':
+            affected = self._coverage_slots(change)
+        else:
+            raise ValueError(f"Unknown change type: {change_type}")
+
+        if not affected:
+            return self._report(affected, [], [], [])
+
+        staff = [person for person in (self.staff_list if self.staff_list is not None else Staff.query.all())
+                 if person.id not in excluded]
+        preferences = PreferenceSnapshot.load(staff)
+        rules = self.constraints.compile(staff, preferences, EligibilityIndex(staff, preferences))
+        positions = {person.id: i for i, person in enumerate(staff)}
+
+        # The saved shifts around the affected ones, ignoring the rows being replanned
+        state = self._load_context(affected, staff, positions, rules)
+
+        reassigned, created, removed = [], [], []
+        for slot in sorted(affected, key=lambda s: s.start_time):
+            allowed = rules.allowed(state, slot)
+            if slot.staff_id in positions:
+                allowed[positions[slot.staff_id]] = False
+
+            if not allowed.any():
+                if isinstance(slot, Shift):
+                    removed.append(slot)
+                continue
+
+            position = int(np.argmin(np.where(allowed, state.hours_in_week(slot), np.inf)))
+            state.record(position, slot)
+            slot.staff_id = staff[position].id
+            (created if isinstance(slot, _CoverageSlot) else reassigned).append(slot)
+
+        self._write_diff(created, removed)
+        return self._report(affected, reassigned, created, removed)
+
+    def _preference_violations(self, staff_id):
+        """Shifts the member can no longer work under their stored preferences"""
+        person = db.session.get(Staff, staff_id)
+        if person is None:
+            raise ValueError("Invalid staff member")
+        preferences = PreferenceSnapshot.load([person])
+        rules = self.constraints.compile([person], preferences, EligibilityIndex([person], preferences))
+        state = AssignmentState([person], rules)
+
+        # Keep the earliest of the member's shifts that the rules still allow
+        affected = []
+        for shift in self._staff_shifts(staff_id):
+            if rules.allows(state, shift, 0):
+                state.record(0, shift)
+            else:
+                affected.append(shift)
+        return affected
+
+    def _staff_shifts(self, staff_id):
+        return Shift.query.filter(
+            Shift.schedule_id == self.schedule_id,
+            Shift.staff_id == staff_id,
+            Shift.start_time >= self.start,
+            Shift.start_time <= self.end
+        ).order_by(Shift.start_time).all()
+
+    def _coverage_slots(self, change):
+        start_time, end_time = change['start_time'], change['end_time']
+        if end_time <= start_time:
+            raise ValueError("Coverage end time must be after its start time")
+        return [_CoverageSlot(start_time, end_time) for _ in range(int(change.get('required_staff', 1)))]
+
+    def _load_context(self, affected, staff, positions, rules):
+        """AssignmentState holding the saved shifts that can decide what the rules allow for `affected`"""
+        lookback = timedelta(days=self.constraints.lookback_days())
+        mondays = [datetime.fromisocalendar(*slot.start_time.isocalendar()[:2], 1) for slot in affected]
+        first = min(min(mondays), min(slot.start_time for slot in affected) - lookback)
+        last = max(max(mondays) + timedelta(days=7), max(slot.end_time for slot in affected) + lookback)
+
+        state = AssignmentState(staff, rules)
+        affected_ids = {id(slot) for slot in affected}
+        rows = Shift.query.filter(
+            Shift.schedule_id == self.schedule_id,
+            Shift.start_time >= first,
+            Shift.start_time < last
+        ).all()
+        for shift in rows:
+            position = positions.get(shift.staff_id)
+            if id(shift) not in affected_ids and position is not None:
+                state.record(position, shift)
+        return state
+
+    def _write_diff(self, created, removed):
+        # Reassigned rows are already dirty in the session and flush as UPDATEs
+        for slot in created:
+            db.session.add(Shift(schedule_id=self.schedule_id, staff_id=slot.staff_id,
+                                 start_time=slot.start_time, end_time=slot.end_time))
+        for shift in removed:
+            db.session.delete(shift)
+        db.session.commit()
+
+    def _report(self, affected, reassigned, created, removed):
+        return {
+            "affected_shifts": len(affected),
+            "affected_days": sorted({slot.start_time.date().isoformat() for slot in affected}),
+            "reassigned": len(reassigned),
+            "created": len(created),
+            "removed": len(removed),
+            "unfilled": len(affected) - len(reassigned) - len(created)
+        }
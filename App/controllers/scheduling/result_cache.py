@@ -0,0 +1,116 @@
+# App/controllers/scheduling/result_cache.py
+import hashlib
+import json
+import os
+import pickle
+import threading
+from collections import OrderedDict
+
+# Bump when strategy output changes so persisted entries are not reused
+CACHE_FORMAT_VERSION = 3
+DEFAULT_CACHE_SIZE = 128
+
+
+class ResultCache:
+    """
+    Content-addressed cache of scheduling results.
+
+    Keys are hashes of everything a run depends on: the kind of result, the
+    strategy, the staff ids and names in order, the preference snapshot's
+    fingerprint, the date range, shifts per day, shift type and the
+    constraints. The
+    strategies are deterministic, so equal keys always mean equal results.
+
+    Values are stored pickled, which keeps cached results isolated from
+    callers that edit what they get back. The newest `max_entries` are held
+    in memory with LRU eviction; with `directory` set every entry is also
+    written to disk and read back after a restart.
+    """
+
+    def __init__(self, max_entries=DEFAULT_CACHE_SIZE, directory=None):
+        self.max_entries = max_entries
+        self.directory = directory
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def key(kind, strategy_name, staff, preferences, start_date, end_date, shifts_per_day, shift_type,
+            constraints=None):
+        """Hex key for a run, or None when it cannot be fingerprinted (staff without ids)"""
+        staff_ids = [getattr(person, 'id', None) for person in staff]
+        if any(staff_id is None for staff_id in staff_ids) or not hasattr(preferences, 'fingerprint'):
+            return None
+        # Usernames too, since formatted schedules list staff by name
+        usernames = [getattr(person, 'username', None) for person in staff]
+        payload = json.dumps([
+            CACHE_FORMAT_VERSION, kind, strategy_name, staff_ids, usernames, preferences.fingerprint(),
+            start_date.isoformat(), end_date.isoformat(), shifts_per_day, shift_type, repr(constraints)
+        ])
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def get(self, key):
+        if key is None:
+            return None
+        with self._lock:
+            data = self._entries.get(key)
+            if data is not None:
+                self._entries.move_to_end(key)
+        if data is None:
+            data = self._read(key)
+            if data is not None:
+                self._remember(key, data)
+        if data is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return pickle.loads(data)
+
+    def put(self, key, value):
+        if key is None:
+            return
+        data = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        self._remember(key, data)
+        self._write(key, data)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+        if self.directory:
+            for name in os.listdir(self.directory):
+                if name.endswith('.pkl'):
+                    os.remove(os.path.join(self.directory, name))
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _remember(self, key, data):
+        with self._lock:
+            self._entries[key] = data
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.pkl")
+
+    def _read(self, key):
+        if not self.directory:
+            return None
+        try:
+            with open(self._path(key), 'rb') as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def _write(self, key, data):
+        if not self.directory:
+            return
+        # Write then rename so a concurrent reader never sees half a file
+        temp_path = f"{self._path(key)}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temp_path, 'wb') as f:
+            f.write(data)
+        os.replace(temp_path, self._path(key))
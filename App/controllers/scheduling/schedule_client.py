@@ -3,9 +3,31 @@ from .EvenDistributeStrategy import EvenDistributeStrategy
 from .MinimizeStrategy import MinimizeDaysStrategy
 from .PreferenceBasedStrategy import PreferenceBasedStrategy
 from .DayNightDistributeStrategy import DayNightDistributeStrategy
+from .OptimalStrategy import OptimalStrategy
+from .preference_snapshot import PreferenceSnapshot
+from .local_search import LocalSearch
+from .compare_engine import CompareEngine
+from .batch_runner import BatchScheduler, partition_staff
+from .replanner import Replanner
+from .carry_over import CarryOver
+from .shift_record import ShiftRecord
+from .demand_plan import DemandPlan
+from .assignment_state import AssignmentState
+from .result_cache import ResultCache, DEFAULT_CACHE_SIZE
+from .constraints import ConstraintSet, validate_summary
+from .stage_timer import StageTimer
+from .metrics import schedule_metrics
 from App.models import Shift
 from App.database import db
+from flask import current_app
+from sqlalchemy import delete, insert
 from datetime import datetime, timedelta
+import time
+import csv
+import io
+
+# Rows per INSERT / COPY batch when saving generated shifts
+DEFAULT_INSERT_CHUNK_SIZE = 5000
 
 class ScheduleClient:
     def __init__(self):
@@ -13,10 +35,25 @@ class ScheduleClient:
             "even-distribute": EvenDistributeStrategy(),
             "minimize-days": MinimizeDaysStrategy(),
             "preference-based": PreferenceBasedStrategy(),
-            "day-night-distribute": DayNightDistributeStrategy()
+            "day-night-distribute": DayNightDistributeStrategy(),
+            "optimal": OptimalStrategy()
         }
+        self._cache = None
+    
+    @property
+    def cache(self):
+        """Result cache, sized from SCHEDULE_CACHE_SIZE and persisted to SCHEDULE_CACHE_DIR if set"""
+        if self._cache is None:
+            try:
+                config = current_app.config
+            except RuntimeError:
+                config = {}  # Outside an application context
+            self._cache = ResultCache(int(config.get('SCHEDULE_CACHE_SIZE', DEFAULT_CACHE_SIZE)),
+                                      config.get('SCHEDULE_CACHE_DIR'))
+        return self._cache
     
-    def generate_schedule(self, strategy_name, staff, shifts, start_date, end_date):
+    def generate_schedule(self, strategy_name, staff, shifts, start_date, end_date, preferences=None,
+                          constraints=None, time_budget=None):
         """
         Generate schedule using the specified strategy
         """
@@ -24,12 +61,33 @@ class ScheduleClient:
             raise ValueError(f"Unknown strategy: {strategy_name}")
         
         strategy = self.strategies[strategy_name]
-        return strategy.generate_schedule(staff, shifts, start_date, end_date)
+        return strategy.generate_schedule(staff, shifts, start_date, end_date, preferences=preferences,
+                                          constraints=constraints, time_budget=time_budget)
     
-    def auto_populate(self, admin_id, schedule_id, strategy_name, staff_list, start_date, end_date, shifts_per_day=2, shift_type='mixed'):
+    def auto_populate(self, admin_id, schedule_id, strategy_name, staff_list, start_date, end_date, shifts_per_day=2, shift_type='mixed',
+                      optimize=False, optimize_budget=1.0, dry_run=False, window_days=None, progress=None,
+                      time_budget=None, save_partial=False):
         """
         Auto-populate schedule with shifts using specified strategy
         Returns result dict for CLI to display
+
+        With optimize=True the strategy's assignment is refined by a local
+        search for up to optimize_budget seconds before it is saved.
+        With dry_run=True the whole pipeline stays in memory: existing shifts
+        are left alone and nothing is written.
+        With window_days set, shifts are generated and assigned one window
+        at a time so memory stays flat over long horizons; only the
+        assignment rows are kept, and they are saved together at the end.
+        progress, if given, is called as progress(stage, fraction) as the
+        run advances.
+        Every response carries `timings`, the wall time and SQL statements
+        of each stage, which are also logged one line per stage.
+        time_budget (seconds, default SCHEDULE_TIME_BUDGET) bounds the
+        strategy. If it runs out, the assignment found so far is returned
+        unvalidated as a dry run with complete=False; only with
+        save_partial=True does it replace the existing shifts.
+        A schedule that fails validation is not saved and the existing
+        shifts stay.
         """
         # Input validation
         if not staff_list:
@@ -41,46 +99,385 @@ class ScheduleClient:
         if shifts_per_day <= 0:
             raise ValueError("Shifts per day must be positive")
         
+        if window_days is not None and window_days <= 0:
+            raise ValueError("Window days must be positive")
+        
+        if time_budget is None:
+            time_budget = self._time_budget()
+        if time_budget is not None and time_budget < 0:
+            raise ValueError("Time budget cannot be negative")
+        
+        timer = StageTimer(db.engine)
         try:
-            # Clear existing shifts for this schedule
-            deleted_count = self._clear_existing_shifts(schedule_id, start_date, end_date)
-            
-            # Generate shifts for the period
-            shifts = self._generate_shifts_for_period(schedule_id, start_date, end_date, shifts_per_day, shift_type)
-            
-            # Use strategy to assign shifts
-            result = self.generate_schedule(
-                strategy_name=strategy_name,
-                staff=staff_list,
-                shifts=shifts,
-                start_date=start_date,
-                end_date=end_date
+            with timer:
+                response = self._populate(schedule_id, strategy_name, staff_list, start_date, end_date,
+                                          shifts_per_day, shift_type, optimize, optimize_budget, dry_run,
+                                          window_days, progress, timer, time_budget, save_partial)
+        except Exception as e:
+            db.session.rollback()
+            response = {
+                "success": False,
+                "message": f"Failed to auto-generate schedule: {str(e)}"
+            }
+        
+        response["timings"] = timer.as_dict()
+        timer.log("auto_populate", schedule_id=schedule_id, strategy=strategy_name,
+                  success=response["success"])
+        return response
+
+    def _populate(self, schedule_id, strategy_name, staff_list, start_date, end_date, shifts_per_day, shift_type,
+                  optimize, optimize_budget, dry_run, window_days, progress, timer, time_budget=None,
+                  save_partial=False):
+        self._report_progress(progress, "loading", 0.0)
+        
+        # Load every staff member's preferences in one query
+        with timer.stage("preferences"):
+            preferences = PreferenceSnapshot.load(staff_list)
+        
+        # The schedule's demand profile, if it has one, replaces shifts_per_day and shift_type
+        with timer.stage("demand"):
+            demand = DemandPlan.load(schedule_id)
+        
+        if window_days:
+            return self._auto_populate_windowed(
+                schedule_id, strategy_name, staff_list, start_date, end_date, shifts_per_day, shift_type,
+                preferences, window_days, optimize, optimize_budget, dry_run, progress, timer,
+                time_budget, demand, save_partial
             )
+        
+        # Generate shifts for the period and assign them with the strategy
+        self._report_progress(progress, "assigning", 0.1)
+        result, shifts = self._run_pipeline(strategy_name, staff_list, start_date, end_date,
+                                            shifts_per_day, shift_type, preferences, timer=timer,
+                                            time_budget=time_budget, demand=demand)
+        complete = result.get('complete', True)
+        
+        # Optionally improve the strategy's assignment with local search
+        search_stats = None
+        if optimize:
+            self._report_progress(progress, "optimizing", 0.5)
+            with timer.stage("local_search"):
+                search_stats = LocalSearch(time_budget=optimize_budget).improve(staff_list, shifts, preferences,
+                                                                                constraints=self._constraints())
+                self._refresh_summary(self.strategies[strategy_name], result, staff_list, shifts, preferences)
+        
+        # Validate before anything is written, so a rejected schedule keeps the old
+        # shifts. A run cut short by its budget is partial by design, so it is not
+        # validated and is only written over the old shifts if the caller asks
+        summary = result.get('summary', {})
+        if complete:
+            with timer.stage("validate"):
+                self._validate_schedule_results(summary, self._staff_to_fill(staff_list, demand, start_date, end_date))
+        elif not save_partial:
+            dry_run = True
+        
+        # Read the assignments while the staff rows are loaded; the save's commit expires them
+        assignments = self._get_assignments_list(shifts)
+        
+        # Clear the existing shifts in the range and save the new ones. The delete
+        # runs only now, so nothing holds a write lock while the strategy works,
+        # and it commits with the save
+        shifts_created = deleted_count = 0
+        if not dry_run:
+            self._report_progress(progress, "saving", 0.8)
+            with timer.stage("clear"):
+                deleted_count = self._clear_existing_shifts(schedule_id, start_date, end_date, commit=False)
+            with timer.stage("save"):
+                shifts_created = self._save_assignments_to_db(schedule_id, assignments)
+        
+        response = {
+            "success": True,
+            "schedule_id": schedule_id,
+            "shifts_created": shifts_created,
+            "shifts_deleted": deleted_count,
+            "score": result.get('score', 0),
+            "summary": summary,  # Return raw summary for CLI to format
+            "metrics": result.get('metrics'),
+            "assignments": assignments,  # Add assignments for CLI display
+            "strategy_used": strategy_name,
+            "dry_run": dry_run,
+            "cached": result.get('cached', False),
+            "complete": complete,
+            "demand_profile": bool(demand)
+        }
+        if search_stats is not None:
+            response["local_search"] = search_stats
+        self._report_progress(progress, "done", 1.0)
+        return response
+
+    def _auto_populate_windowed(self, schedule_id, strategy_name, staff_list, start_date, end_date, shifts_per_day,
+                                shift_type, preferences, window_days, optimize, optimize_budget, dry_run,
+                                progress=None, timer=None, time_budget=None, demand=None, save_partial=False):
+        """
+        Run the pipeline window by window. Each window's rules carry the load
+        and recent shifts of the windows before it, so weekly caps and the
+        other constraints hold across window boundaries. Every window is
+        assigned and the whole run validated before anything is written.
+        """
+        timer = timer or StageTimer()
+        constraints = self._constraints()
+        lookback_days = constraints.lookback_days()
+        # One budget for the whole run, shared out to the windows as they start
+        deadline = None if time_budget is None else time.monotonic() + time_budget
+        complete = True
+        carry = CarryOver()
+        assignments = []
+        shifts_created = deleted_count = 0
+        windows = 0
+        total_windows = -(-((end_date - start_date).days + 1) // window_days)
+        
+        window_start = start_date
+        while window_start <= end_date:
+            window_end = min(window_start + timedelta(days=window_days - 1), end_date)
             
-            # Save shifts to database
-            shifts_created = self._save_shifts_to_db(schedule_id, shifts)
+            # Least-loaded staff first so the strategies' tie-breaks even out across windows
+            staff = carry.order(staff_list)
+            window_constraints = constraints.carrying(carry.load(window_start, lookback_days))
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            result, shifts = self._run_pipeline(strategy_name, staff, window_start, window_end,
+                                                shifts_per_day, shift_type, preferences,
+                                                constraints=window_constraints, timer=timer,
+                                                time_budget=remaining, demand=demand)
+            complete = complete and result.get('complete', True)
+            if optimize:
+                with timer.stage("local_search"):
+                    LocalSearch(time_budget=optimize_budget).improve(staff, shifts, preferences,
+                                                                     constraints=window_constraints)
             
-            # Validate results
-            summary = result.get('summary', {})
-            self._validate_schedule_results(summary, len(staff_list))
+            # Keep the window's rows, not its shifts; nothing is written until every window passes
+            carry.record(shifts)
+            assignments.extend(self._get_assignments_list(shifts))
             
-            return {
-                "success": True,
-                "schedule_id": schedule_id,
-                "shifts_created": shifts_created,
-                "shifts_deleted": deleted_count,
-                "score": result.get('score', 0),
-                "summary": summary,  # Return raw summary for CLI to format
-                "assignments": self._get_assignments_list(shifts),  # Add assignments for CLI display
-                "strategy_used": strategy_name
-            }
-                
+            windows += 1
+            window_start = window_end + timedelta(days=1)
+            self._report_progress(progress, f"window {windows}/{total_windows}", 0.8 * windows / total_windows)
+        
+        # As in a single-window run, a partial result is kept as a dry run unless save_partial
+        summary = carry.summary(staff_list, self.strategies[strategy_name])
+        if complete:
+            with timer.stage("validate"):
+                self._validate_schedule_results(summary, self._staff_to_fill(staff_list, demand, start_date, end_date))
+        elif not save_partial:
+            dry_run = True
+        
+        # The clear and every window's rows commit together
+        if not dry_run:
+            self._report_progress(progress, "saving", 0.8)
+            with timer.stage("clear"):
+                deleted_count = self._clear_existing_shifts(schedule_id, start_date, end_date, commit=False)
+            with timer.stage("save"):
+                shifts_created = self._save_assignments_to_db(schedule_id, assignments)
+        
+        self._report_progress(progress, "done", 1.0)
+        return {
+            "success": True,
+            "schedule_id": schedule_id,
+            "shifts_created": shifts_created,
+            "shifts_deleted": deleted_count,
+            "score": summary["fairness_score"],
+            "summary": summary,
+            "assignments": assignments,
+            "strategy_used": strategy_name,
+            "dry_run": dry_run,
+            "windows": windows,
+            "complete": complete,
+            "demand_profile": bool(demand)
+        }
+
+    def _report_progress(self, progress, stage, fraction):
+        if progress is not None:
+            progress(stage, fraction)
+
+    def compare_strategies(self, admin_id, schedule_id, strategy_names, staff_list, start_date, end_date,
+                           shifts_per_day=2, shift_type='mixed', persist=False, parallel=True):
+        """
+        Dry-run each strategy in parallel and rank them by score.
+        Nothing is written unless persist=True, in which case only the
+        winner's assignments replace the shifts in the date range.
+        """
+        if not staff_list:
+            raise ValueError("Staff list cannot be empty")
+        
+        if start_date > end_date:
+            raise ValueError("Start date must be before end date")
+        
+        unknown = [name for name in strategy_names if name not in self.strategies]
+        if unknown:
+            raise ValueError(f"Unknown strategy: {unknown[0]}")
+        
+        # One snapshot and demand profile shared by every run
+        preferences = PreferenceSnapshot.load(staff_list)
+        results, best_strategy = CompareEngine().compare(
+            strategy_names, staff_list, preferences, start_date, end_date,
+            shifts_per_day, shift_type, parallel=parallel, cache=self.cache,
+            constraints=self._constraints(), thresholds=self._validation_thresholds(),
+            demand=DemandPlan.load(schedule_id)
+        )
+        
+        comparison = {
+            "success": True,
+            "results": results,
+            "best_strategy": best_strategy
+        }
+        if persist and best_strategy is not None:
+            try:
+                # The delete commits with the save, so a failed save keeps the old shifts
+                comparison["shifts_deleted"] = self._clear_existing_shifts(schedule_id, start_date, end_date,
+                                                                           commit=False)
+                comparison["shifts_created"] = self._save_assignments_to_db(
+                    schedule_id, results[best_strategy]["assignments"])
+            except Exception as e:
+                db.session.rollback()
+                return {
+                    "success": False,
+                    "message": f"Failed to save best schedule: {str(e)}"
+                }
+        return comparison
+
+    def batch_populate(self, admin_id, schedule_ids, strategy_name, staff_list, start_date, end_date,
+                       shifts_per_day=2, shift_type='mixed', window_days=None, parallel=True):
+        """
+        Auto-populate several independent schedules at once.
+        The staff are split into one disjoint group per schedule and each
+        schedule runs in its own worker process with its own session.
+        """
+        if not schedule_ids:
+            raise ValueError("Schedule list cannot be empty")
+        
+        if len(staff_list) < len(schedule_ids):
+            raise ValueError("Need at least one staff member per schedule")
+        
+        if start_date > end_date:
+            raise ValueError("Start date must be before end date")
+        
+        if strategy_name not in self.strategies:
+            raise ValueError(f"Unknown strategy: {strategy_name}")
+        
+        staff_by_schedule = partition_staff([staff.id for staff in staff_list], list(schedule_ids))
+        options = {
+            "strategy_name": strategy_name,
+            "start_date": start_date,
+            "end_date": end_date,
+            "shifts_per_day": shifts_per_day,
+            "shift_type": shift_type,
+            "window_days": window_days
+        }
+        database_uri = db.engine.url.render_as_string(hide_password=False)
+        # Release this process's connections so workers start with clean ones
+        db.session.commit()
+        return BatchScheduler().run(database_uri, admin_id, staff_by_schedule, options, parallel=parallel)
+
+    def replan(self, schedule_id, start_date, end_date, change, staff_list=None):
+        """
+        Repair a saved schedule after a single change (see Replanner),
+        touching only the shifts the change affects.
+        """
+        if start_date > end_date:
+            raise ValueError("Start date must be before end date")
+        
+        try:
+            report = Replanner(schedule_id, start_date, end_date, staff_list,
+                               constraints=self._constraints()).replan(change)
         except Exception as e:
             db.session.rollback()
             return {
                 "success": False,
-                "message": f"Failed to auto-generate schedule: {str(e)}"
+                "message": f"Failed to re-plan schedule: {str(e)}"
             }
+        
+        report.update({"success": True, "schedule_id": schedule_id})
+        return report
+
+    def _run_pipeline(self, strategy_name, staff, start_date, end_date, shifts_per_day, shift_type, preferences,
+                      constraints=None, timer=None, time_budget=None, demand=None):
+        """
+        Generate the period's shifts and assign them in memory; returns (result, shifts).
+        With a non-empty DemandPlan the shifts are its slots instead of
+        shifts_per_day shifts of shift_type.
+        Identical inputs are answered from the result cache. Runs cut short
+        by time_budget are not cached, since a later run may finish, and
+        nor are windows carrying load from earlier windows.
+        """
+        timer = timer or StageTimer()
+        if constraints is None:
+            constraints = self._constraints()
+        with timer.stage("cache_lookup"):
+            key = None
+            if not constraints.carried:
+                key = ResultCache.key('pipeline', strategy_name, staff, preferences, start_date, end_date,
+                                      shifts_per_day, shift_type, (constraints, demand) if demand else constraints)
+            entry = self.cache.get(key)
+            if entry is not None:
+                return self._restore_pipeline(entry, staff)
+        
+        with timer.stage("generate_shifts"):
+            if demand:
+                shifts = demand.expand(start_date, end_date)
+            else:
+                shifts = self._generate_shifts_for_period(None, start_date, end_date, shifts_per_day, shift_type)
+        with timer.stage("strategy"):
+            result = self.generate_schedule(
+                strategy_name=strategy_name,
+                staff=staff,
+                shifts=shifts,
+                start_date=start_date,
+                end_date=end_date,
+                preferences=preferences,
+                constraints=constraints,
+                time_budget=time_budget
+            )
+        if key is not None and result.get('complete', True):
+            with timer.stage("cache_store"):
+                self.cache.put(key, self._pipeline_entry(result, shifts, staff))
+        return result, shifts
+
+    def _pipeline_entry(self, result, shifts, staff):
+        """Cacheable form of a run: assignments by staff position, no live objects"""
+        positions = {id(person): i for i, person in enumerate(staff)}
+        slots = [(shift.start_time, shift.end_time, shift.shift_type, shift.required_staff,
+                  tuple(shift.required_skills), [positions[id(person)] for person in shift.assigned_staff])
+                 for shift in shifts]
+        stored = dict(result)
+        schedule_is_shifts = stored.get('schedule') is shifts
+        if schedule_is_shifts:
+            stored['schedule'] = None
+        return {'result': stored, 'slots': slots, 'schedule_is_shifts': schedule_is_shifts}
+
+    def _restore_pipeline(self, entry, staff):
+        shifts = []
+        for start_time, end_time, shift_type, required_staff, required_skills, positions in entry['slots']:
+            shift = ShiftRecord(start_time, end_time, shift_type, required_staff, required_skills)
+            shift.assigned_staff = [staff[position] for position in positions]
+            shifts.append(shift)
+        AssignmentState.from_shifts(staff, shifts).publish()
+        
+        result = entry['result']
+        if entry['schedule_is_shifts']:
+            result['schedule'] = shifts
+        result['cached'] = True
+        return result, shifts
+
+    def _refresh_summary(self, strategy, result, staff, shifts, preferences=None):
+        """Recompute the load figures and metrics in a strategy result after assignments changed"""
+        if 'metrics' in result:
+            result['metrics'] = schedule_metrics(staff, shifts, preferences)
+        state = AssignmentState.from_shifts(staff, shifts)
+        summary = result.setdefault('summary', {})
+        summary.update(strategy._generate_summary(state))
+
+        hours = state.hours
+        shift_counts = state.shift_counts
+        if 'staff_with_assignments' in summary:
+            summary['staff_with_assignments'] = int((shift_counts > 0).sum())
+        if 'min_shifts' in summary:
+            summary['min_shifts'] = int(shift_counts.min()) if len(shift_counts) else 0
+            summary['max_shifts'] = int(shift_counts.max()) if len(shift_counts) else 0
+        if 'hours_std_dev' in summary:
+            summary['hours_std_dev'] = strategy._calculate_std_dev(hours)
+            summary['shifts_std_dev'] = strategy._calculate_std_dev(shift_counts)
+        if 'fairness_score' in summary:
+            summary['fairness_score'] = strategy._calculate_fairness_score(hours, shift_counts)
+            result['score'] = summary['fairness_score']
 
     def _get_assignments_list(self, shifts):
         """Get list of assignments for CLI display"""
@@ -96,71 +493,129 @@ class ScheduleClient:
                     })
         return assignments
 
-    def _validate_schedule_results(self, summary, staff_count):
+    def _validate_schedule_results(self, summary, staff_count, thresholds=None):
         """Validate that the schedule results are reasonable"""
         if not summary:
             return
         
-        # Check for extreme imbalances
-        if summary.get('max_hours', 0) - summary.get('min_hours', 0) > 20:
-            raise ValueError("Schedule too unbalanced - hour difference exceeds 20 hours")
-        
-        # Check if all staff got reasonable assignments
-        if summary.get('total_shifts_assigned', 0) < staff_count:
-            raise ValueError("Not enough shifts assigned - some staff may have no shifts")
-        
-        # Check for reasonable distribution
-        if summary.get('max_hours', 0) > summary.get('average_hours_per_staff', 0) * 1.5:
-            raise ValueError("Schedule distribution too uneven")
+        if thresholds is None:
+            thresholds = self._validation_thresholds()
+        validate_summary(summary, staff_count, thresholds)
 
-    def _clear_existing_shifts(self, schedule_id, start_date, end_date):
-        """Clear existing shifts in the date range"""
+    def _staff_to_fill(self, staff_list, demand, start_date, end_date):
+        """Staff a run can be expected to give shifts: with a demand profile, no more than its seats"""
+        if not demand:
+            return len(staff_list)
+        return min(len(staff_list), demand.seats(start_date, end_date))
+
+    def _constraints(self):
+        """Rules from the SCHEDULE_CONSTRAINTS config, on top of the defaults"""
+        try:
+            return ConstraintSet.from_config(current_app.config.get('SCHEDULE_CONSTRAINTS'))
+        except RuntimeError:
+            # Outside an application context
+            return ConstraintSet.default()
+
+    def _time_budget(self):
+        """Default strategy time budget from SCHEDULE_TIME_BUDGET, or None for no limit"""
+        try:
+            budget = current_app.config.get('SCHEDULE_TIME_BUDGET')
+        except RuntimeError:
+            return None
+        return None if budget is None else float(budget)
+
+    def _validation_thresholds(self):
+        try:
+            return current_app.config.get('SCHEDULE_VALIDATION')
+        except RuntimeError:
+            return None
+
+    def _clear_existing_shifts(self, schedule_id, start_date, end_date, commit=True):
+        """
+        Clear existing shifts in the date range.
+        With commit=False the delete is left for the next commit, which also
+        keeps the loaded staff rows from being expired and reloaded one by one.
+        """
         start_datetime = datetime.combine(start_date, datetime.min.time())
         end_datetime = datetime.combine(end_date, datetime.max.time())
         
-        shifts = Shift.query.filter(
-            Shift.schedule_id == schedule_id,
-            Shift.start_time >= start_datetime,
-            Shift.start_time <= end_datetime
-        ).all()
-        
-        for shift in shifts:
-            db.session.delete(shift)
-        db.session.commit()
+        # One set-based DELETE; the rows are never loaded as ORM objects
+        result = db.session.execute(
+            delete(Shift)
+            .where(
+                Shift.schedule_id == schedule_id,
+                Shift.start_time >= start_datetime,
+                Shift.start_time <= end_datetime
+            )
+            .execution_options(synchronize_session=False)
+        )
+        if commit:
+            db.session.commit()
         
-        return len(shifts)
+        return result.rowcount
 
-    def _save_shifts_to_db(self, schedule_id, shifts):
-        """Save assigned shifts to database and return count"""
+    def _save_assignments_to_db(self, schedule_id, assignments):
+        """
+        Bulk-insert assignment dicts (staff_id, start_time, end_time) and return count.
+        Rows are written in chunks of SCHEDULE_INSERT_CHUNK_SIZE, with COPY on
+        PostgreSQL and an executemany INSERT elsewhere, in one transaction.
+        """
+        chunk_size = self._insert_chunk_size()
+        use_copy = db.session.get_bind().dialect.name == 'postgresql'
         shifts_created = 0
         
-        for shift in shifts:
-            if hasattr(shift, 'assigned_staff') and shift.assigned_staff:
-                for staff in shift.assigned_staff:
-                    try:
-                        # Get staff ID safely
-                        staff_id = getattr(staff, 'id', None)
-                        if staff_id is None:
-                            continue
-                        
-                        new_shift = Shift(
-                            schedule_id=schedule_id,
-                            staff_id=staff_id,
-                            start_time=shift.start_time,
-                            end_time=shift.end_time
-                        )
-                        db.session.add(new_shift)
-                        shifts_created += 1
-                    except Exception as e:
-                        # Log error but don't print - let CLI handle display
-                        continue
-        
         try:
+            chunk = []
+            for assignment in assignments:
+                # Skip in-memory staff that have no database row
+                if assignment.get('staff_id') is None:
+                    continue
+                chunk.append(assignment)
+                if len(chunk) >= chunk_size:
+                    shifts_created += self._insert_chunk(schedule_id, chunk, use_copy)
+                    chunk = []
+            if chunk:
+                shifts_created += self._insert_chunk(schedule_id, chunk, use_copy)
+            
             db.session.commit()
             return shifts_created
-        except Exception as e:
+        except Exception:
             db.session.rollback()
             raise
+
+    def _insert_chunk(self, schedule_id, chunk, use_copy):
+        if use_copy:
+            # COPY through the session's own connection so it joins the transaction
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            for assignment in chunk:
+                writer.writerow((schedule_id, assignment['staff_id'],
+                                 assignment['start_time'].isoformat(), assignment['end_time'].isoformat()))
+            buffer.seek(0)
+            cursor = db.session.connection().connection.cursor()
+            try:
+                cursor.copy_expert(
+                    f"COPY {Shift.__table__.name} (schedule_id, staff_id, start_time, end_time) "
+                    "FROM STDIN WITH (FORMAT csv)",
+                    buffer
+                )
+            finally:
+                cursor.close()
+        else:
+            db.session.execute(insert(Shift), [{
+                'schedule_id': schedule_id,
+                'staff_id': assignment['staff_id'],
+                'start_time': assignment['start_time'],
+                'end_time': assignment['end_time']
+            } for assignment in chunk])
+        return len(chunk)
+
+    def _insert_chunk_size(self):
+        try:
+            return int(current_app.config.get('SCHEDULE_INSERT_CHUNK_SIZE', DEFAULT_INSERT_CHUNK_SIZE))
+        except RuntimeError:
+            # Outside an application context
+            return DEFAULT_INSERT_CHUNK_SIZE
         
     def _generate_shifts_for_period(self, schedule_id, start_date, end_date, shifts_per_day, shift_type):
         """Generate shift objects for the given period"""
@@ -170,19 +625,7 @@ class ScheduleClient:
         while current_date <= end_date:
             for shift_num in range(shifts_per_day):
                 shift_times = self._get_shift_times(current_date, shift_num, shifts_per_day, shift_type)
-                
-                class MockShift:
-                    def __init__(self, start_time, end_time):
-                        self.start_time = start_time
-                        self.end_time = end_time
-                        self.assigned_staff = []
-                        self.required_staff = 1
-                        self.duration_hours = (end_time - start_time).total_seconds() / 3600
-                        self.required_skills = []
-                        self.shift_type = shift_type
-                
-                shift = MockShift(shift_times['start'], shift_times['end'])
-                shifts.append(shift)
+                shifts.append(ShiftRecord(shift_times['start'], shift_times['end'], shift_type))
             
             current_date += timedelta(days=1)
         
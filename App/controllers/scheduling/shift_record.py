@@ -0,0 +1,27 @@
+# App/controllers/scheduling/shift_record.py
+
+
+class ShiftRecord:
+    """
+    In-memory shift handed to the strategies before anything is saved.
+
+    Slotted so a generated schedule carries no per-shift __dict__; the
+    duration is derived from the times instead of being stored.
+    """
+
+    __slots__ = ('start_time', 'end_time', 'assigned_staff', 'required_staff', 'required_skills', 'shift_type')
+
+    def __init__(self, start_time, end_time, shift_type='mixed', required_staff=1, required_skills=()):
+        self.start_time = start_time
+        self.end_time = end_time
+        self.assigned_staff = []
+        self.required_staff = required_staff
+        self.required_skills = required_skills
+        self.shift_type = shift_type
+
+    @property
+    def duration_hours(self):
+        return (self.end_time - self.start_time).total_seconds() / 3600
+
+    def __repr__(self):
+        return f"<ShiftRecord {self.start_time:%Y-%m-%d %H:%M}-{self.end_time:%H:%M} staff={len(self.assigned_staff)}>"
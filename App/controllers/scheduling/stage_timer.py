@@ -0,0 +1,96 @@
+# App/controllers/scheduling/stage_timer.py
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from sqlalchemy import event
+
+logger = logging.getLogger(__name__)
+
+
+class QueryCounter:
+    """
+    Counts SQL statements sent through an engine while active.
+
+    Only statements from the thread that entered the counter are counted,
+    so runs in other threads (background jobs, parallel compares) sharing
+    the engine do not inflate each other's figures.
+    """
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.count = 0
+        self._thread = None
+
+    def __enter__(self):
+        self._thread = threading.get_ident()
+        event.listen(self.engine, "before_cursor_execute", self._count)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(self.engine, "before_cursor_execute", self._count)
+
+    def _count(self, *args):
+        if threading.get_ident() == self._thread:
+            self.count += 1
+
+
+class StageTimer:
+    """
+    Wall time and SQL statements per stage of one scheduling run.
+
+    Wrap the run in `with timer:` to count statements on the engine, then
+    each step in `with timer.stage(name):`. A stage entered more than once
+    (one per window, say) accumulates, with `calls` saying how often.
+    """
+
+    def __init__(self, engine=None):
+        self.stages = {}
+        self._queries = QueryCounter(engine) if engine is not None else None
+        self._started = None
+        self._seconds = 0.0
+
+    def __enter__(self):
+        self._started = time.perf_counter()
+        if self._queries is not None:
+            self._queries.__enter__()
+        return self
+
+    def __exit__(self, *exc):
+        if self._queries is not None:
+            self._queries.__exit__(*exc)
+        self._seconds = time.perf_counter() - self._started
+
+    @contextmanager
+    def stage(self, name):
+        queries = self._query_count()
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            totals = self.stages.setdefault(name, {"seconds": 0.0, "sql_queries": 0, "calls": 0})
+            totals["seconds"] += time.perf_counter() - started
+            totals["sql_queries"] += self._query_count() - queries
+            totals["calls"] += 1
+
+    def as_dict(self):
+        """JSON-ready timings: every stage in the order first entered, plus the totals"""
+        return {
+            "stages": {name: dict(totals, seconds=round(totals["seconds"], 6))
+                       for name, totals in self.stages.items()},
+            "total_seconds": round(self._seconds, 6),
+            "sql_queries": self._query_count()
+        }
+
+    def log(self, event_name, **context):
+        """One key=value line per stage and one for the whole run"""
+        fields = ' '.join(f"{key}={value}" for key, value in context.items())
+        timings = self.as_dict()
+        for name, totals in timings["stages"].items():
+            logger.info("%s %s stage=%s seconds=%.6f sql_queries=%d calls=%d", event_name, fields, name,
+                        totals["seconds"], totals["sql_queries"], totals["calls"])
+        logger.info("%s %s stage=total seconds=%.6f sql_queries=%d", event_name, fields,
+                    timings["total_seconds"], timings["sql_queries"])
+
+    def _query_count(self):
+        return self._queries.count if self._queries is not None else 0
@@ -5,4 +5,5 @@ from App.models.schedule import Schedule
 from App.models.shift import Shift 
 from App.models.preferences import Preferences
 from App.models.shiftType import ShiftType
-
+from App.models.schedulingJob import SchedulingJob
+from App.models.demandProfile import DemandProfile
@@ -0,0 +1,35 @@
+from App.database import db
+
+
+class DemandProfile(db.Model):
+    """
+    How many staff a schedule needs for one weekday and shift type,
+    optionally with a given skill. A schedule's rows together make its
+    demand profile, e.g. 3 cashiers and 1 supervisor on Saturday evenings.
+    """
+    __tablename__ = 'demand_profile'
+    __table_args__ = (
+        db.UniqueConstraint('schedule_id', 'weekday', 'shift_type', 'skill', name='uq_demand_slot'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    schedule_id = db.Column(db.Integer, db.ForeignKey('schedule.id'), nullable=False, index=True)
+    weekday = db.Column(db.Integer, nullable=False)  # 0 = Monday .. 6 = Sunday
+    shift_type = db.Column(db.String(20), nullable=False)  # morning, evening or night
+    skill = db.Column(db.String(50), nullable=True)  # None = any staff member
+    headcount = db.Column(db.Integer, nullable=False, default=1)
+    # Optional overrides of the shift type's usual hours
+    start_time = db.Column(db.Time, nullable=True)
+    end_time = db.Column(db.Time, nullable=True)
+
+    def get_json(self):
+        return {
+            "id": self.id,
+            "schedule_id": self.schedule_id,
+            "weekday": self.weekday,
+            "shift_type": self.shift_type,
+            "skill": self.skill,
+            "headcount": self.headcount,
+            "start_time": self.start_time.strftime("%H:%M") if self.start_time else None,
+            "end_time": self.end_time.strftime("%H:%M") if self.end_time else None
+        }
@@ -0,0 +1,43 @@
+from datetime import datetime
+from App.database import db
+from sqlalchemy import JSON
+
+
+class SchedulingJob(db.Model):
+    __tablename__ = 'scheduling_job'
+
+    id = db.Column(db.Integer, primary_key=True)
+    schedule_id = db.Column(db.Integer, db.ForeignKey('schedule.id'), nullable=True)
+    created_by = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=True)
+    status = db.Column(db.String(20), nullable=False, default='queued')  # queued, running, succeeded, failed
+    progress = db.Column(db.Float, nullable=False, default=0.0)  # 0.0 - 1.0
+    stage = db.Column(db.String(50), nullable=True)
+    params = db.Column(JSON, nullable=True)
+    result = db.Column(JSON, nullable=True)
+    error = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime, nullable=True)
+    finished_at = db.Column(db.DateTime, nullable=True)
+
+    def get_json(self):
+        queued_seconds = None
+        run_seconds = None
+        if self.started_at and self.created_at:
+            queued_seconds = (self.started_at - self.created_at).total_seconds()
+        if self.started_at:
+            run_seconds = ((self.finished_at or datetime.utcnow()) - self.started_at).total_seconds()
+
+        return {
+            "id": self.id,
+            "schedule_id": self.schedule_id,
+            "status": self.status,
+            "progress": self.progress,
+            "stage": self.stage,
+            "result": self.result,
+            "error": self.error,
+            "created_at": self.created_at.isoformat() if self.created_at else None,
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+            "queued_seconds": queued_seconds,
+            "run_seconds": run_seconds
+        }
@@ -104,13 +104,14 @@ class SchedulingStrategyUnitTests(unittest.TestCase):
         self.assertIsInstance(scheduler, Scheduler)
         
         available_strategies = scheduler.get_available_strategies()
-        # UPDATE: Include all five strategies
+        # UPDATE: Include all six strategies
         expected_strategies = [
             "even_distribute", 
             "minimize_days", 
             "shift_type_optimize",
             "preference_based",
-            "day_night_distribute"
+            "day_night_distribute",
+            "optimal"
         ]
         self.assertEqual(set(available_strategies), set(expected_strategies))
 
@@ -530,13 +531,14 @@ class SchedulerIntegrationTests(unittest.TestCase):
 
     def test_scheduler_get_available_strategies(self):
         strategies = self.scheduler.get_available_strategies()
-        # UPDATE: Include all five strategies
+        # UPDATE: Include all six strategies
         expected = [
             "even_distribute", 
             "minimize_days", 
             "shift_type_optimize",
             "preference_based", 
-            "day_night_distribute"
+            "day_night_distribute",
+            "optimal"
         ]
         self.assertEqual(set(strategies), set(expected))
 
@@ -1479,12 +1481,12 @@ class UpdatedSchedulerIntegrationTests(unittest.TestCase):
 
     def test_scheduler_get_available_strategies(self):
         strategies = self.scheduler.get_available_strategies()
-        # Updated expected strategies to include all five
-        expected = ["even_distribute", "minimize_days", "shift_type_optimize", "preference_based", "day_night_distribute"]
+        # Updated expected strategies to include all six
+        expected = ["even_distribute", "minimize_days", "shift_type_optimize", "preference_based", "day_night_distribute", "optimal"]
         # Check that all expected strategies are present
         for strategy in expected:
             self.assertIn(strategy, strategies)
-        self.assertEqual(len(strategies), 5)
+        self.assertEqual(len(strategies), 6)
 
 
 @pytest.fixture(autouse=True)
@@ -80,8 +80,10 @@ class PreferencesIntegrationTests(unittest.TestCase):
 
         self.assertEqual(result["strategy"], "Shift Type Optimization")
 
-        morning_assigned = any(getattr(s, 'shift_type', '') == 'morning' for s in getattr(staff_list[0], 'assigned_shifts', []))
-        evening_assigned = any(getattr(s, 'shift_type', '') == 'evening' for s in getattr(staff_list[1], 'assigned_shifts', []))
+        # Assignments live on the shifts; ORM staff objects are not modified
+        morning_assigned = staff_list[0] in shifts[0].assigned_staff
+        evening_assigned = staff_list[1] in shifts[1].assigned_staff
+        self.assertFalse(hasattr(staff_list[0], 'assigned_shifts'))
 
         # At least one of the staff should receive an assignment matching their preference
         self.assertTrue(morning_assigned or evening_assigned)
@@ -0,0 +1,1138 @@
+import pytest
+from datetime import datetime
+from sqlalchemy import event
+
+from App.main import create_app
+from App.controllers import create_user
+from App.controllers.preferences import set_preferences
+from App.controllers.scheduling import PreferenceBasedStrategy, DayNightDistributeStrategy
+from App.controllers.scheduling.preference_snapshot import PreferenceSnapshot
+from App.database import db, create_db
+from App.models import Staff
+
+
+@pytest.fixture(autouse=True)
+def clean_db_local():
+    # run these tests inside an application context with an in-memory sqlite DB
+    app = create_app({"TESTING": True, "SQLALCHEMY_DATABASE_URI": "sqlite:///:memory:"})
+    ctx = app.app_context()
+    ctx.push()
+    try:
+        db.drop_all()
+        create_db()
+        yield
+    finally:
+        db.session.remove()
+        db.drop_all()
+        ctx.pop()
+
+
+class CountQueries:
+    """Count SQL statements executed inside the block"""
+
+    def __enter__(self):
+        self.count = 0
+        event.listen(db.engine, "before_cursor_execute", self._count)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(db.engine, "before_cursor_execute", self._count)
+
+    def _count(self, *args):
+        self.count += 1
+
+
+class ShiftTemplate:
+    def __init__(self, start, end):
+        self.start_time = start
+        self.end_time = end
+        self.shift_type = "mixed"
+        self.required_skills = []
+        self.assigned_staff = []
+        self.duration_hours = (end - start).total_seconds() / 3600
+        self.required_staff = 1
+
+
+def make_shifts(days):
+    shifts = []
+    for day in range(1, days + 1):
+        shifts.append(ShiftTemplate(datetime(2025, 1, day, 8), datetime(2025, 1, day, 16)))
+        shifts.append(ShiftTemplate(datetime(2025, 1, day, 22), datetime(2025, 1, day + 1, 6)))
+    return shifts
+
+
+def make_staff(count):
+    staff = []
+    for i in range(count):
+        person = create_user(f"snap_staff{i}", "pass", "staff")
+        set_preferences(person.id, preferred_shift_types=["morning"] if i % 2 else ["night"],
+                        unavailable_days=[6], max_hours_per_week=40)
+        staff.append(person.id)
+    # reload in one query so ids are not lazily refreshed one by one
+    return Staff.query.filter(Staff.id.in_(staff)).order_by(Staff.id).all()
+
+
+def test_preference_snapshot_loads_in_one_query():
+    plain_id = create_user("snap_plain", "pass", "staff").id
+    staff = make_staff(4)
+    plain = db.session.get(Staff, plain_id)
+
+    with CountQueries() as counter:
+        snapshot = PreferenceSnapshot.load(staff + [plain])
+
+    assert counter.count == 1
+    assert snapshot.get(staff[0])["preferred_shift_types"] == ["night"]
+    assert snapshot.get(staff[1])["unavailable_days"] == [6]
+    # staff without a preferences row fall back to the Staff defaults
+    assert snapshot.get(plain)["preferred_shift_types"] == ["regular"]
+    assert snapshot.get(plain)["max_hours_per_week"] == 40
+
+
+@pytest.mark.parametrize("strategy", [PreferenceBasedStrategy(), DayNightDistributeStrategy()])
+def test_strategies_do_not_query_with_snapshot(strategy):
+    staff = make_staff(6)
+    snapshot = PreferenceSnapshot.load(staff)
+
+    with CountQueries() as counter:
+        strategy.generate_schedule(staff, make_shifts(5), datetime(2025, 1, 1), datetime(2025, 1, 5),
+                                   preferences=snapshot)
+
+    assert counter.count == 0
+
+
+class PlainStaff:
+    def __init__(self, staff_id):
+        self.id = staff_id
+        self.username = f"plain{staff_id}"
+
+
+def test_even_distribute_balances_large_staff():
+    from App.controllers.scheduling import EvenDistributeStrategy
+
+    staff = [PlainStaff(i) for i in range(1, 1201)]
+    shifts = [shift for _ in range(40) for shift in make_shifts(30)]  # two per staff member
+
+    result = EvenDistributeStrategy().generate_schedule(staff, shifts, datetime(2025, 1, 1), datetime(2025, 1, 30))
+    summary = result["summary"]
+
+    assert summary["total_shifts_assigned"] == len(shifts)
+    assert summary["min_shifts"] == summary["max_shifts"] == 2
+    assert summary["staff_with_assignments"] == len(staff)
+    assert isinstance(summary["total_hours_assigned"], float)
+    assert result["score"] == summary["fairness_score"] == 100
+
+
+def test_assignment_queue_rekeys_lazily():
+    from App.controllers.scheduling.assignment_queue import AssignmentQueue
+
+    load = {"a": 5, "b": 1, "c": 3}
+    queue = AssignmentQueue(list(load), key=lambda name: load[name])
+
+    assert queue.pop_best(1) == ["b"]
+    load["b"] = 10
+    queue.push("b")
+
+    # "a" is skipped by accept but stays queued for the next shift
+    assert queue.pop_best(2, accept=lambda name: name != "a") == ["c", "b"]
+    assert queue.pop_best(3) == ["a"]
+
+    load["a"] = 0
+    queue.push("a")
+    queue.push("a")  # the older entry is now stale
+    queue.discard("a")
+    assert queue.pop_best(1) == []
+
+
+def test_eligibility_index_resolves_shift_to_staff_bitset():
+    from App.controllers.scheduling.eligibility import EligibilityIndex
+
+    class Person:
+        def __init__(self, skills, unavailable_days, preferred):
+            self.skills = skills
+            self.unavailable_days = unavailable_days
+            self.preferred_shift_types = preferred
+
+    cashier = Person(["cashier"], [6], ["morning"])
+    stocker = Person(["stocking"], [], ["night"])
+    both = Person(["cashier", "stocking"], [0], ["morning", "night"])
+    staff = [cashier, stocker, both]
+    index = EligibilityIndex(staff, PreferenceSnapshot.load(staff))
+
+    saturday = ShiftTemplate(datetime(2025, 1, 4, 8), datetime(2025, 1, 4, 16))
+    saturday.required_skills = ["cashier"]
+    sunday = ShiftTemplate(datetime(2025, 1, 5, 8), datetime(2025, 1, 5, 16))
+    sunday.required_skills = ["cashier"]
+
+    assert index.members(index.eligible(saturday)) == [cashier, both]
+    assert index.members(index.eligible(sunday)) == [both]
+    assert index.members(index.eligible(saturday, "night")) == [both]
+    assert list(index.eligible_array(sunday)) == [False, False, True]
+    assert index.can_work(both, sunday) and not index.can_work(stocker, saturday)
+    assert index.staff_preferring("morning") == [cashier, both]
+
+
+def test_optimal_strategy_backends_agree(monkeypatch):
+    import importlib
+    from App.controllers.scheduling import OptimalStrategy
+    from App.controllers.scheduling.OptimalStrategy import linear_sum_assignment
+
+    shapes = []
+    if linear_sum_assignment is not None:
+        def recording(cost):
+            shapes.append(cost.shape)
+            return linear_sum_assignment(cost)
+        monkeypatch.setattr(importlib.import_module("App.controllers.scheduling.OptimalStrategy"),
+                            "linear_sum_assignment", recording)
+
+    backends = ["flow"] + (["scipy"] if linear_sum_assignment is not None else [])
+    results = []
+    for backend in backends:
+        staff = [PlainStaff(i) for i in range(1, 31)]
+        shifts = make_shifts(14)
+        result = OptimalStrategy(backend=backend).generate_schedule(
+            staff, shifts, datetime(2025, 1, 1), datetime(2025, 1, 14))
+        results.append(result)
+
+        hours = [getattr(person, "total_hours", 0) for person in staff]
+        assert result["solver"]["complete"] and result["solver"]["days_total"] == 14
+        assert result["solver"]["backend"] == backend
+        assert all(shift.assigned_staff for shift in shifts)
+        assert max(hours) - min(hours) <= 8
+
+    assert len({r["summary"]["total_hours_assigned"] for r in results}) == 1
+    # One small problem per day: the day's two slots by at most two shifts per member
+    assert all(rows <= 2 and columns <= 2 * 30 for rows, columns in shapes)
+
+
+def test_local_search_rebalances_greedy_schedule():
+    from App.controllers.scheduling.local_search import LocalSearch
+
+    class Person(PlainStaff):
+        def __init__(self, staff_id):
+            super().__init__(staff_id)
+            self.preferred_shift_types = ["morning"] if staff_id % 3 else ["evening"]
+            self.unavailable_days = [staff_id % 7]
+
+    staff = [Person(i) for i in range(1, 41)]
+    shifts = []
+    for day in range(6, 31):
+        for _ in range(3):
+            shifts.append(ShiftTemplate(datetime(2025, 1, day, 8), datetime(2025, 1, day, 16)))
+            shifts.append(ShiftTemplate(datetime(2025, 1, day, 16), datetime(2025, 1, day, 23, 59)))
+    snapshot = PreferenceSnapshot.load(staff)
+    PreferenceBasedStrategy().generate_schedule(staff, shifts, datetime(2025, 1, 6), datetime(2025, 1, 30),
+                                                preferences=snapshot)
+    before = [person.total_hours for person in staff]
+
+    stats = LocalSearch(time_budget=5).improve(staff, shifts, snapshot)
+    after = [person.total_hours for person in staff]
+
+    assert stats["objective_after"] < stats["objective_before"]
+    assert max(after) - min(after) < max(before) - min(before)
+    assert sum(len(shift.assigned_staff) for shift in shifts) == len(shifts)
+    for person in staff:
+        days = [shift.start_time.date() for shift in person.assigned_shifts]
+        assert person.unavailable_days[0] not in {day.weekday() for day in days}
+
+
+def test_local_search_iterates_within_its_budget():
+    import time
+    from App.controllers.scheduling import EvenDistributeStrategy
+    from App.controllers.scheduling.assignment_state import AssignmentState
+    from App.controllers.scheduling.local_search import LocalSearch
+
+    staff = [PlainStaff(i) for i in range(1, 13)]
+    shifts = []
+    for day in range(1, 29):
+        for start, headcount in ((7, 3), (15, 2)):
+            shift = ShiftTemplate(datetime(2025, 1, day, start), datetime(2025, 1, day, start + 8))
+            shift.required_staff = headcount
+            shifts.append(shift)
+    snapshot = PreferenceSnapshot.load(staff)
+    EvenDistributeStrategy().generate_schedule(staff, shifts, datetime(2025, 1, 1), datetime(2025, 1, 28),
+                                               preferences=snapshot)
+
+    started = time.monotonic()
+    stats = LocalSearch(time_budget=0.5, max_stale=10 ** 6).improve(staff, shifts, snapshot)
+    elapsed = time.monotonic() - started
+
+    # Feasibility is only checked for winning candidates, so a scan is milliseconds, not most of a second
+    assert stats["iterations"] >= 20
+    assert elapsed < 0.5 + 0.2  # the deadline is checked inside the scan too
+
+    # Releasing one of two shifts on a day keeps the day worked
+    state = AssignmentState(staff[:1])
+    early, late = shifts[0], shifts[1]
+    state.record(0, early)
+    state.record(0, late)
+    state.release(0, early)
+    assert state.days_worked[0] == 1 and state.has_worked_day(0, late.start_time.toordinal())
+    state.release(0, late)
+    assert state.days_worked[0] == 0 and not state.has_worked_day(0, late.start_time.toordinal())
+
+
+def test_compare_strategies_dry_runs_and_persists_only_winner(monkeypatch):
+    from datetime import date
+    from App.controllers.scheduling.schedule_client import ScheduleClient
+    from App.models import Schedule, Shift
+
+    admin = create_user("cmp_admin", "pass", "admin")
+    schedule = Schedule(name="Compare", created_by=admin.id)
+    db.session.add(schedule)
+    db.session.commit()
+    staff = make_staff(4)
+    names = ["even-distribute", "minimize-days", "preference-based"]
+
+    client = ScheduleClient()
+    result = client.compare_strategies(admin.id, schedule.id, names, staff,
+                                       date(2025, 1, 6), date(2025, 1, 12))
+
+    assert result["success"] and set(result["results"]) == set(names)
+    assert result["best_strategy"] == "even-distribute"
+    assert result["results"]["even-distribute"]["assignments_count"] == 12  # nobody works Sundays
+    assert Shift.query.filter_by(schedule_id=schedule.id).count() == 0
+
+    result = client.compare_strategies(admin.id, schedule.id, names, staff,
+                                       date(2025, 1, 6), date(2025, 1, 12), persist=True, parallel=False)
+    assert result["shifts_created"] == 12
+    assert Shift.query.filter_by(schedule_id=schedule.id).count() == 12
+
+    # A save that fails rolls the delete back with it
+    def fail(*args):
+        raise RuntimeError("disk full")
+
+    monkeypatch.setattr(ScheduleClient, "_insert_chunk", fail)
+    result = client.compare_strategies(admin.id, schedule.id, names, staff,
+                                       date(2025, 1, 6), date(2025, 1, 12), persist=True, parallel=False)
+    assert not result["success"] and "disk full" in result["message"]
+    assert Shift.query.filter_by(schedule_id=schedule.id).count() == 12
+
+
+def test_auto_populate_dry_run_leaves_schedule_untouched():
+    from datetime import date
+    from App.controllers.scheduling.schedule_client import ScheduleClient
+    from App.models import Schedule, Shift
+
+    admin = create_user("dry_admin", "pass", "admin")
+    schedule = Schedule(name="Dry", created_by=admin.id)
+    db.session.add(schedule)
+    db.session.commit()
+    staff = make_staff(4)
+    existing = Shift(schedule_id=schedule.id, staff_id=staff[0].id,
+                     start_time=datetime(2025, 1, 7, 8), end_time=datetime(2025, 1, 7, 16))
+    db.session.add(existing)
+    db.session.commit()
+    admin_id, schedule_id = admin.id, schedule.id
+    staff = Staff.query.filter(Staff.id.in_([s.id for s in staff])).order_by(Staff.id).all()
+
+    with CountQueries() as counter:
+        result = ScheduleClient().auto_populate(admin_id, schedule_id, "even-distribute", staff,
+                                                date(2025, 1, 6), date(2025, 1, 12), dry_run=True)
+
+    assert result["success"] and result["dry_run"]
+    assert result["shifts_created"] == result["shifts_deleted"] == 0
+    assert len(result["assignments"]) == 12
+    assert counter.count == 2  # the preference snapshot and the demand profile
+    assert Shift.query.filter_by(schedule_id=schedule_id).count() == 1
+
+
+def test_auto_populate_keeps_old_shifts_when_validation_fails():
+    from datetime import date
+    from flask import current_app
+    from App.controllers.scheduling.schedule_client import ScheduleClient
+    from App.models import Schedule, Shift
+
+    admin = create_user("reject_admin", "pass", "admin")
+    schedule = Schedule(name="Rejected", created_by=admin.id)
+    db.session.add(schedule)
+    db.session.commit()
+    staff = make_staff(4)
+    db.session.add(Shift(schedule_id=schedule.id, staff_id=staff[0].id,
+                         start_time=datetime(2025, 1, 7, 8), end_time=datetime(2025, 1, 7, 16)))
+    db.session.commit()
+    admin_id, schedule_id = admin.id, schedule.id
+    staff = Staff.query.filter(Staff.id.in_([s.id for s in staff])).order_by(Staff.id).all()
+    current_app.config["SCHEDULE_VALIDATION"] = {"min_shifts_per_staff": 10}
+
+    result = ScheduleClient().auto_populate(admin_id, schedule_id, "even-distribute", staff,
+                                            date(2025, 1, 6), date(2025, 1, 12))
+
+    assert not result["success"] and "Not enough shifts" in result["message"]
+    assert "clear" not in result["timings"]["stages"] and "save" not in result["timings"]["stages"]
+    kept = Shift.query.filter_by(schedule_id=schedule_id).all()
+    assert [(shift.staff_id, shift.start_time) for shift in kept] == [(staff[0].id, datetime(2025, 1, 7, 8))]
+
+
+def test_save_assignments_bulk_inserts_in_chunks():
+    from flask import current_app
+    from App.controllers.scheduling.schedule_client import ScheduleClient
+    from App.models import Shift
+
+    staff = make_staff(2)
+    ids = [person.id for person in staff]
+    assignments = [{"staff_id": ids[i % 2], "start_time": datetime(2025, 1, 1 + i % 28, 8),
+                    "end_time": datetime(2025, 1, 1 + i % 28, 16)} for i in range(250)]
+    assignments.append({"staff_id": None, "start_time": datetime(2025, 1, 1, 8),
+                        "end_time": datetime(2025, 1, 1, 16)})
+    current_app.config["SCHEDULE_INSERT_CHUNK_SIZE"] = 100
+
+    with CountQueries() as counter:
+        created = ScheduleClient()._save_assignments_to_db(None, iter(assignments))
+
+    assert created == 250
+    assert counter.count == 3  # one batched INSERT per chunk
+    assert Shift.query.count() == 250
+    assert Shift.query.filter_by(staff_id=ids[1]).count() == 125
+
+
+def test_clear_existing_shifts_is_one_delete():
+    from datetime import date
+    from App.controllers.scheduling.schedule_client import ScheduleClient
+    from App.models import Schedule, Shift
+
+    admin = create_user("clear_admin", "pass", "admin")
+    schedule = Schedule(name="Clear", created_by=admin.id)
+    db.session.add(schedule)
+    db.session.commit()
+    schedule_id, staff_id = schedule.id, make_staff(1)[0].id
+    for day in (5, 6, 9, 12, 13):
+        db.session.add(Shift(schedule_id=schedule_id, staff_id=staff_id,
+                             start_time=datetime(2025, 1, day, 20), end_time=datetime(2025, 1, day, 23)))
+    db.session.commit()
+
+    with CountQueries() as counter:
+        deleted = ScheduleClient()._clear_existing_shifts(schedule_id, date(2025, 1, 6), date(2025, 1, 12))
+
+    assert deleted == 3
+    assert counter.count == 1
+    assert sorted(s.start_time.day for s in Shift.query.all()) == [5, 13]
+
+
+def test_replan_only_touches_affected_shifts():
+    from datetime import date
+    from App.controllers.scheduling.schedule_client import ScheduleClient
+    from App.models import Schedule, Shift
+
+    admin = create_user("replan_admin", "pass", "admin")
+    schedule = Schedule(name="Replan", created_by=admin.id)
+    db.session.add(schedule)
+    db.session.commit()
+    schedule_id = schedule.id
+    staff = make_staff(4)
+    staff_ids = [person.id for person in staff]
+    client = ScheduleClient()
+    client.auto_populate(admin.id, schedule_id, "even-distribute", staff, date(2025, 1, 6), date(2025, 1, 19))
+    before = {row.id: row.staff_id for row in Shift.query.all()}
+
+    # The first member can no longer work Tuesdays
+    set_preferences(staff_ids[0], unavailable_days=[1, 6])
+    result = client.replan(schedule_id, date(2025, 1, 6), date(2025, 1, 19),
+                           {"type": "preferences", "staff_id": staff_ids[0]})
+    after = {row.id: row.staff_id for row in Shift.query.all()}
+    changed = {shift_id for shift_id in before if before[shift_id] != after[shift_id]}
+
+    assert result["success"] and result["unfilled"] == 0
+    assert result["reassigned"] == len(changed) == result["affected_shifts"] > 0
+    assert all(db.session.get(Shift, shift_id).start_time.weekday() == 1 for shift_id in changed)
+    assert not any(s.staff_id == staff_ids[0] and s.start_time.weekday() == 1 for s in Shift.query.all())
+
+    result = client.replan(schedule_id, date(2025, 1, 6), date(2025, 1, 19),
+                           {"type": "remove_staff", "staff_id": staff_ids[1]})
+    assert result["success"] and result["affected_shifts"] > 0
+    assert Shift.query.filter_by(staff_id=staff_ids[1]).count() == 0
+    assert Shift.query.count() == len(before) - result["removed"]
+
+    result = client.replan(schedule_id, date(2025, 1, 6), date(2025, 1, 19),
+                           {"type": "coverage", "start_time": datetime(2025, 1, 8, 12),
+                            "end_time": datetime(2025, 1, 8, 18), "required_staff": 2},
+                           staff_list=[staff[0], staff[2], staff[3]])
+    # Two of the three remaining members already work that day
+    assert result["created"] == result["unfilled"] == 1
+    assert Shift.query.filter_by(start_time=datetime(2025, 1, 8, 12)).count() == 1
+
+
+def test_replan_view_keeps_preferences_only_when_replan_succeeds():
+    from flask import current_app
+    from App.controllers import get_preferences
+    from App.models import Schedule
+
+    admin = create_user("replan_view_admin", "pass", "admin")
+    schedule = Schedule(name="Replan view", created_by=admin.id)
+    db.session.add(schedule)
+    db.session.commit()
+    staff_id = make_staff(1)[0].id
+    body = {"admin_id": admin.id, "schedule_id": schedule.id, "start_date": "2025-01-19", "end_date": "2025-01-06",
+            "change": {"type": "preferences", "staff_id": staff_id, "preferences": {"max_hours_per_week": 8}}}
+    client = current_app.test_client()
+
+    assert client.post('/api/scheduling/replan', json=body).status_code == 400
+    assert get_preferences(staff_id)["max_hours_per_week"] == 40
+
+    body.update(start_date="2025-01-06", end_date="2025-01-19")
+    assert client.post('/api/scheduling/replan', json=body).status_code == 200
+    db.session.expire_all()
+    assert get_preferences(staff_id)["max_hours_per_week"] == 8
+
+
+def test_windowed_auto_populate_carries_load_between_windows():
+    from datetime import date
+    from App.controllers.scheduling.schedule_client import ScheduleClient
+
+    staff = [PlainStaff(i) for i in range(1, 6)]
+    result = ScheduleClient().auto_populate(None, None, "even-distribute", staff, date(2025, 1, 6),
+                                            date(2025, 3, 2), shifts_per_day=1, dry_run=True, window_days=7)
+    summary = result["summary"]
+
+    # 56 daily shifts over 5 people: each weekly window leaves 2 extra shifts,
+    # which the carried hours rotate instead of always giving to the same staff
+    assert result["success"] and result["windows"] == 8
+    assert summary["total_shifts_assigned"] == len(result["assignments"]) == 56
+    assert summary["max_shifts"] - summary["min_shifts"] <= 1
+
+    # Three-day windows from a Thursday straddle the ISO weeks; each member's week stays under their cap
+    staff[0].max_hours_per_week = 16
+    result = ScheduleClient().auto_populate(None, None, "even-distribute", staff, date(2025, 1, 9),
+                                            date(2025, 1, 20), dry_run=True, window_days=3)
+    assert result["success"] and result["windows"] == 4
+    week_hours = {}
+    for assignment in result["assignments"]:
+        key = (assignment["staff_id"], assignment["start_time"].isocalendar()[:2])
+        hours = (assignment["end_time"] - assignment["start_time"]).total_seconds() / 3600
+        week_hours[key] = week_hours.get(key, 0) + hours
+    caps = {person.id: getattr(person, "max_hours_per_week", 40) for person in staff}
+    assert all(hours <= caps[staff_id] for (staff_id, _), hours in week_hours.items())
+
+
+def test_windowed_auto_populate_writes_only_after_validation():
+    from datetime import date
+    from flask import current_app
+    from App.controllers.scheduling.schedule_client import ScheduleClient
+    from App.models import Schedule, Shift
+
+    admin = create_user("window_admin", "pass", "admin")
+    schedule = Schedule(name="Windowed", created_by=admin.id)
+    db.session.add(schedule)
+    db.session.commit()
+    staff = make_staff(4)
+    db.session.add(Shift(schedule_id=schedule.id, staff_id=staff[0].id,
+                         start_time=datetime(2025, 1, 7, 8), end_time=datetime(2025, 1, 7, 16)))
+    db.session.commit()
+    admin_id, schedule_id = admin.id, schedule.id
+    staff = Staff.query.filter(Staff.id.in_([s.id for s in staff])).order_by(Staff.id).all()
+
+    current_app.config["SCHEDULE_VALIDATION"] = {"min_shifts_per_staff": 10}
+    rejected = ScheduleClient().auto_populate(admin_id, schedule_id, "even-distribute", staff,
+                                              date(2025, 1, 6), date(2025, 1, 19), window_days=3)
+    assert not rejected["success"] and "Not enough shifts" in rejected["message"]
+    assert [shift.start_time for shift in Shift.query.filter_by(schedule_id=schedule_id)] == [datetime(2025, 1, 7, 8)]
+
+    del current_app.config["SCHEDULE_VALIDATION"]
+    with CountQueries() as counter:
+        result = ScheduleClient().auto_populate(admin_id, schedule_id, "even-distribute", staff,
+                                                date(2025, 1, 6), date(2025, 1, 19), window_days=3)
+    assert result["success"] and result["windows"] == 5
+    assert result["shifts_deleted"] == 1 and result["shifts_created"] == len(result["assignments"]) == 24
+    assert result["timings"]["stages"]["save"]["calls"] == 1
+    assert Shift.query.filter_by(schedule_id=schedule_id).count() == 24
+    assert counter.count == result["timings"]["sql_queries"]
+
+
+@pytest.mark.parametrize("strategy_name", ["even-distribute", "minimize-days", "preference-based",
+                                           "day-night-distribute", "optimal"])
+def test_weekly_cap_holds_across_window_boundaries(strategy_name):
+    from datetime import date
+    from App.controllers.scheduling.schedule_client import ScheduleClient
+
+    staff = [PlainStaff(i) for i in range(1, 5)]
+    for person in staff:
+        person.preferred_shift_types = ["mixed"]  # the generated shifts' type, which minimize-days needs
+    staff[0].max_hours_per_week = 16
+    # Three-day windows split the week of 6 January into three pieces
+    windowed, whole = (ScheduleClient().auto_populate(None, None, strategy_name, staff, date(2025, 1, 6),
+                                                      date(2025, 1, 12), dry_run=True, window_days=days)
+                       for days in (3, None))
+
+    assert windowed["success"] and whole["success"]
+    for result in (windowed, whole):
+        capped = [a for a in result["assignments"] if a["staff_id"] == 1]
+        assert sum((a["end_time"] - a["start_time"]).total_seconds() for a in capped) <= 16 * 3600
+
+
+def test_generated_shifts_are_slotted_records():
+    from datetime import date
+    from App.controllers.scheduling import ShiftRecord
+    from App.controllers.scheduling.schedule_client import ScheduleClient
+
+    shifts = ScheduleClient()._generate_shifts_for_period(None, date(2025, 1, 6), date(2025, 1, 8), 2, "mixed")
+
+    assert len(shifts) == 6 and {type(shift) for shift in shifts} == {ShiftRecord}
+    assert not hasattr(shifts[0], "__dict__")
+    assert shifts[0].duration_hours == 8 and shifts[0].shift_type == "mixed"
+
+
+@pytest.mark.parametrize("strategy_name", ["even_distribute", "minimize_days", "shift_type_optimize",
+                                           "preference_based", "day_night_distribute", "optimal"])
+def test_strategies_leave_orm_staff_untouched(strategy_name):
+    from App.controllers.scheduling import Scheduler
+
+    staff = make_staff(4)
+    shifts = make_shifts(7)
+    result = Scheduler().generate_schedule(strategy_name, staff, shifts, datetime(2025, 1, 1),
+                                           datetime(2025, 1, 7), preferences=PreferenceSnapshot.load(staff))
+
+    assert result["summary"]["total_staff"] == 4
+    assert sum(len(shift.assigned_staff) for shift in shifts) == result["summary"]["total_shifts_assigned"]
+    assert not any(hasattr(person, attr) for person in staff
+                   for attr in ("assigned_shifts", "total_hours", "days_worked"))
+    assert not db.session.dirty
+
+
+def test_minimize_days_tracks_days_over_long_horizon():
+    import time
+    from datetime import timedelta
+    from App.controllers.scheduling import MinimizeDaysStrategy
+
+    class Person(PlainStaff):
+        max_hours_per_week = 10 ** 4  # let one long run exercise day tracking, not the hours cap
+
+    staff = [Person(i) for i in range(1, 31)]
+    shifts = []
+    for day in range(180):
+        start = datetime(2025, 1, 1, 6) + timedelta(days=day)
+        for hour in (0, 4, 8, 12):
+            shift = ShiftTemplate(start + timedelta(hours=hour), start + timedelta(hours=hour + 4))
+            shift.shift_type = "regular"
+            shifts.append(shift)
+
+    started = time.perf_counter()
+    result = MinimizeDaysStrategy().generate_schedule(staff, shifts, datetime(2025, 1, 1), datetime(2025, 6, 29))
+    elapsed = time.perf_counter() - started
+
+    assert result["summary"]["total_shifts_assigned"] == len(shifts)
+    for person in staff:
+        days = [shift.start_time.date() for shift in person.assigned_shifts]
+        assert len(days) == len(set(days)) == person.days_worked
+    assert result["summary"]["max_days"] - result["summary"]["min_days"] <= 1
+    assert elapsed < 2
+
+
+def test_async_auto_populate_reports_progress_through_job(tmp_path):
+    import time
+    from flask.globals import app_ctx
+    from App.models import Schedule, Shift
+
+    from App.controllers.scheduling.job_queue import job_queue
+
+    # A file database, so the job can run in a worker process with a connection of its own
+    app = create_app({"TESTING": True, "SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path / 'jobs.db'}"})
+    pushed = app_ctx._get_current_object()  # create_app pushes a context of its own
+    try:
+        admin = create_user("job_admin", "pass", "admin")
+        schedule = Schedule(name="Job", created_by=admin.id)
+        db.session.add(schedule)
+        db.session.commit()
+        staff_ids = [person.id for person in make_staff(4)]
+        admin_id, schedule_id = admin.id, schedule.id
+        db.session.remove()
+        client = app.test_client()
+
+        response = client.post("/api/scheduling/auto-populate", json={
+            "admin_id": admin_id, "schedule_id": schedule_id, "strategy_name": "even-distribute",
+            "staff_ids": staff_ids, "start_date": "2025-01-06", "end_date": "2025-01-12", "async": True
+        })
+        assert response.status_code == 202
+        status_url = response.get_json()["status_url"]
+
+        deadline = time.monotonic() + 30
+        while True:
+            job = client.get(status_url).get_json()["job"]
+            if job["status"] in ("succeeded", "failed") or time.monotonic() > deadline:
+                break
+            time.sleep(0.05)
+
+        assert job["status"] == "succeeded", job["error"]
+        assert job["progress"] == 1.0 and job["stage"] == "done"
+        assert job["result"]["shifts_created"] == job["result"]["assignments_count"] == 12
+        assert job["run_seconds"] is not None
+        # Progress is written on its own connection, so the run's staff rows are never expired
+        stages = job["result"]["timings"]["stages"]
+        assert stages["preferences"]["sql_queries"] == 1 and stages["cache_lookup"]["sql_queries"] == 0
+        assert Shift.query.filter_by(schedule_id=schedule_id).count() == 12
+        assert client.get("/api/scheduling/jobs/999").status_code == 404
+        assert job_queue._executor is not None and job_queue._threads is None
+    finally:
+        db.session.remove()
+        pushed.pop()
+
+
+def test_batch_populate_runs_each_schedule_in_its_own_process(tmp_path):
+    from datetime import date
+    from App.controllers.scheduling.schedule_client import ScheduleClient
+    from App.models import Schedule, Shift
+
+    from flask.globals import app_ctx
+
+    app = create_app({"TESTING": True, "SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path / 'batch.db'}"})
+    pushed = app_ctx._get_current_object()  # create_app pushes a context of its own
+    try:
+        admin = create_user("batch_admin", "pass", "admin")
+        schedules = [Schedule(name=f"Site {i}", created_by=admin.id) for i in range(2)]
+        db.session.add_all(schedules)
+        db.session.commit()
+        schedule_ids = [schedule.id for schedule in schedules]
+        staff = make_staff(8)
+
+        result = ScheduleClient().batch_populate(admin.id, schedule_ids, "even-distribute", staff,
+                                                 date(2025, 1, 6), date(2025, 1, 12))
+
+        assert result["success"] and result["parallel"]
+        assert [result["results"][i]["staff_count"] for i in schedule_ids] == [4, 4]
+        for schedule_id in schedule_ids:
+            assert result["results"][schedule_id]["shifts_created"] == 12
+            assert Shift.query.filter_by(schedule_id=schedule_id).count() == 12
+        first, second = ({shift.staff_id for shift in Shift.query.filter_by(schedule_id=i)} for i in schedule_ids)
+        assert not first & second
+    finally:
+        db.session.remove()
+        pushed.pop()
+
+
+def test_result_cache_answers_repeated_runs_until_preferences_change(tmp_path):
+    from datetime import date
+    from App.controllers.scheduling.schedule_client import ScheduleClient
+    from App.controllers.scheduling.result_cache import ResultCache
+    from App.models import Schedule
+
+    admin = create_user("cache_admin", "pass", "admin")
+    schedule = Schedule(name="Cache", created_by=admin.id)
+    db.session.add(schedule)
+    db.session.commit()
+    staff = make_staff(4)
+    admin_id, schedule_id, staff_ids = admin.id, schedule.id, [person.id for person in staff]
+    client = ScheduleClient()
+    client._cache = ResultCache(max_entries=2, directory=str(tmp_path))
+
+    def preview():
+        people = Staff.query.filter(Staff.id.in_(staff_ids)).order_by(Staff.id).all()
+        return client.auto_populate(admin_id, schedule_id, "even-distribute", people,
+                                    date(2025, 1, 6), date(2025, 1, 12), dry_run=True)
+
+    first, second = preview(), preview()
+    assert not first["cached"] and second["cached"]
+    assert second["assignments"] == first["assignments"] and second["summary"] == first["summary"]
+
+    set_preferences(staff_ids[0], unavailable_days=[0, 6])
+    assert not preview()["cached"]
+
+    # The LRU keeps two entries in memory; a fresh client, as after a restart, reads them from disk
+    people = Staff.query.filter(Staff.id.in_(staff_ids)).order_by(Staff.id).all()
+    client.auto_populate(admin_id, schedule_id, "even-distribute", people,
+                         date(2025, 1, 13), date(2025, 1, 19), dry_run=True)
+    restarted = ScheduleClient()
+    restarted._cache = ResultCache(max_entries=2, directory=str(tmp_path))
+    result = restarted.auto_populate(admin_id, schedule_id, "even-distribute", people,
+                                     date(2025, 1, 6), date(2025, 1, 12), dry_run=True)
+    assert result["cached"] and len(client.cache) == 2
+
+
+@pytest.mark.parametrize("strategy_name", ["even_distribute", "preference_based", "day_night_distribute",
+                                           "optimal"])
+def test_strategies_respect_compiled_constraints(strategy_name):
+    from App.controllers.scheduling import Scheduler
+    from App.controllers.scheduling.constraints import (ConstraintSet, MinRestHours, MaxConsecutiveDays,
+                                                        MaxNightsPerWeek, is_night)
+
+    staff = [PlainStaff(i) for i in range(1, 7)]
+    shifts = make_shifts(14)
+    constraints = ConstraintSet([MinRestHours(11), MaxConsecutiveDays(3), MaxNightsPerWeek(1)])
+
+    Scheduler().generate_schedule(strategy_name, staff, shifts, datetime(2025, 1, 1), datetime(2025, 1, 14),
+                                  constraints=constraints)
+
+    for person in staff:
+        worked = sorted((s for s in shifts if person in s.assigned_staff), key=lambda s: s.start_time)
+        assert worked
+        for before, after in zip(worked, worked[1:]):
+            assert (after.start_time - before.end_time).total_seconds() >= 11 * 3600
+        days = sorted({s.start_time.toordinal() for s in worked})
+        streak = 1
+        for before, after in zip(days, days[1:]):
+            streak = streak + 1 if after == before + 1 else 1
+            assert streak <= 3
+        weeks = [s.start_time.isocalendar()[:2] for s in worked if is_night(s)]
+        assert all(weeks.count(week) <= 1 for week in weeks)
+
+
+def test_compiled_constraints_do_not_depend_on_assignment_order():
+    from App.controllers.scheduling import Scheduler
+    from App.controllers.scheduling.eligibility import EligibilityIndex
+    from App.controllers.scheduling.assignment_state import AssignmentState
+    from App.controllers.scheduling.constraints import ConstraintSet, MinRestHours, MaxConsecutiveDays
+
+    staff = [PlainStaff(1), PlainStaff(2)]
+    preferences = PreferenceSnapshot({})
+    shifts = make_shifts(7)
+    mornings = shifts[::2]
+    rules = ConstraintSet([MinRestHours(11), MaxConsecutiveDays(3)]).compile(
+        staff, preferences, EligibilityIndex(staff, preferences))
+    state = AssignmentState(staff, rules)
+    # Days 4, 1 and 2, recorded out of order
+    for shift in (mornings[3], mornings[0], mornings[1]):
+        state.assign(0, shift)
+
+    assert not rules.allowed(state, mornings[2])[0]  # would join 1-2 and 4 into four days
+    assert not rules.allows(state, mornings[2], 0)
+    assert rules.allows(state, mornings[2], 1)
+    # The night before day 4's morning leaves only two hours of rest
+    assert not rules.allowed(state, shifts[5])[0] and rules.allowed(state, shifts[5])[1]
+    rules.release(0, mornings[3])
+    assert rules.allows(state, mornings[2], 0)
+
+    # Optimal fills unsolved slots after placing the week, out of start-time order
+    Scheduler().generate_schedule("optimal", staff, shifts, datetime(2025, 1, 1), datetime(2025, 1, 7),
+                                  constraints=ConstraintSet([MaxConsecutiveDays(3)]))
+    for person in staff:
+        days = sorted({s.start_time.toordinal() for s in shifts if person in s.assigned_staff})
+        assert days and all(later - earlier > 3 for earlier, later in zip(days, days[3:]))
+
+
+def test_local_search_and_replan_enforce_configured_constraints():
+    from datetime import date
+    from flask import current_app
+    from App.controllers.scheduling.local_search import LocalSearch
+    from App.controllers.scheduling.schedule_client import ScheduleClient
+    from App.controllers.scheduling.constraints import ConstraintSet
+    from App.models import Schedule, Shift
+
+    def day_shift(day, start=8, end=16):
+        return ShiftTemplate(datetime(2025, 1, day, start), datetime(2025, 1, day, end))
+
+    # A works Mon, Tue and Thu; B works Wed twice and Fri to Sun, and A is off Fri to Sun,
+    # so the only way to even them out is to hand A a Wednesday shift
+    a, b = PlainStaff(1), PlainStaff(2)
+    preferences = PreferenceSnapshot({1: {'unavailable_days': [4, 5, 6]}})
+    shifts = [day_shift(6), day_shift(7), day_shift(9), day_shift(8), day_shift(8, 16, 23),
+              day_shift(10), day_shift(11), day_shift(12)]
+    for shift in shifts:
+        shift.assigned_staff = [a if shift.start_time.day in (6, 7, 9) else b]
+
+    stats = LocalSearch(time_budget=1).improve([a, b], shifts, preferences,
+                                               constraints=ConstraintSet.from_config({'max_consecutive_days': 3}))
+    assert stats["objective_after"] < stats["objective_before"]
+    days = sorted({shift.start_time.day for shift in shifts if a in shift.assigned_staff})
+    assert days != [6, 7, 8, 9]
+
+    # The re-planner reads the same rules from SCHEDULE_CONSTRAINTS
+    current_app.config['SCHEDULE_CONSTRAINTS'] = {'max_consecutive_days': 3}
+    admin = create_user("rules_admin", "pass", "admin")
+    schedule = Schedule(name="Rules", created_by=admin.id)
+    db.session.add(schedule)
+    db.session.commit()
+    x, w = make_staff(2)
+    for staff_id, days in ((x.id, (6, 7, 9)), (w.id, (6, 10, 11))):
+        for day in days:
+            db.session.add(Shift(schedule_id=schedule.id, staff_id=staff_id,
+                                 start_time=datetime(2025, 1, day, 8), end_time=datetime(2025, 1, day, 16)))
+    db.session.add(Shift(schedule_id=schedule.id, staff_id=w.id,
+                         start_time=datetime(2025, 1, 11, 16), end_time=datetime(2025, 1, 11, 23)))
+    db.session.commit()
+
+    result = ScheduleClient().replan(schedule.id, date(2025, 1, 6), date(2025, 1, 12),
+                                     {"type": "coverage", "start_time": datetime(2025, 1, 8, 8),
+                                      "end_time": datetime(2025, 1, 8, 16)}, staff_list=[x, w])
+    assert result["created"] == 1
+    # x has fewer hours, but Wednesday would make Monday to Thursday four days in a row
+    assert Shift.query.filter_by(start_time=datetime(2025, 1, 8, 8)).one().staff_id == w.id
+
+
+@pytest.mark.parametrize("strategy_name", ["even_distribute", "preference_based", "optimal"])
+def test_max_hours_applies_per_week_over_long_horizons(strategy_name):
+    from App.controllers.scheduling import Scheduler
+    from App.controllers.scheduling.assignment_state import AssignmentState
+
+    staff = [PlainStaff(i) for i in range(1, 5)]
+    shifts = make_shifts(28)  # 112 hours each over four weeks, under 40 in any one week
+
+    Scheduler().generate_schedule(strategy_name, staff, shifts, datetime(2025, 1, 1), datetime(2025, 1, 28))
+
+    assert all(len(shift.assigned_staff) == 1 for shift in shifts)
+    state = AssignmentState.from_shifts(staff, shifts)
+    assert state.hours.sum() == 28 * 16
+    assert state.week_hours.max() <= 40
+
+
+def test_benchmark_harness_reports_every_run():
+    import json
+    from App.benchmarks import benchmark_app, run_benchmarks
+
+    report = run_benchmarks(benchmark_app(), sizes=[10], horizons=[7],
+                            strategies=['even_distribute', 'preference_based'])
+
+    json.dumps(report)
+    assert [r['strategy'] for r in report['results']] == ['even_distribute', 'preference_based']
+    for result in report['results']:
+        assert result['staff'] == 10 and result['shifts'] == 14
+        assert result['sql_queries'] == 1  # the preference snapshot
+        assert result['wall_seconds'] > 0 and result['peak_memory_bytes'] > 0
+        assert 0 < result['coverage'] <= 1
+    # The harness ran on its own database
+    assert Staff.query.filter(Staff.username.like('bench%')).count() == 0
+
+
+def test_benchmark_harness_records_a_failing_strategy(monkeypatch):
+    from App.benchmarks import benchmark_app, run_benchmarks
+    from App.controllers.scheduling import EvenDistributeStrategy
+
+    def fail(self, *args, **kwargs):
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr(EvenDistributeStrategy, "generate_schedule", fail)
+    report = run_benchmarks(benchmark_app(), sizes=[10], horizons=[7],
+                            strategies=['even_distribute', 'preference_based'])
+
+    failed, ok = report['results']
+    assert failed['strategy'] == 'even_distribute' and failed['error'] == "RuntimeError: boom"
+    assert 'wall_seconds' not in failed
+    assert ok['strategy'] == 'preference_based' and 'error' not in ok and ok['shifts'] == 14
+
+
+def test_benchmark_harness_skips_strategies_above_their_staff_limit():
+    from App.benchmarks import benchmark_app, run_benchmarks
+    from App.benchmarks.scheduling import STAFF_LIMITS
+
+    assert STAFF_LIMITS['optimal'] < 10000  # the default sizes stay within what optimal can hold in memory
+    report = run_benchmarks(benchmark_app(), sizes=[10], horizons=[7], strategies=['optimal', 'even_distribute'],
+                            staff_limits={'optimal': 5})
+
+    skipped, ran = report['results']
+    assert skipped == {"strategy": "optimal", "staff": 10, "days": 7, "skipped": "more than 5 staff"}
+    assert ran['strategy'] == 'even_distribute' and ran['shifts'] == 14
+
+
+def test_auto_populate_reports_stage_timings():
+    import logging
+    from datetime import date
+    from App.controllers.scheduling.schedule_client import ScheduleClient
+    from App.models import Schedule
+
+    admin = create_user("timing_admin", "pass", "admin")
+    schedule = Schedule(name="Timed", created_by=admin.id)
+    db.session.add(schedule)
+    db.session.commit()
+    admin_id, schedule_id = admin.id, schedule.id
+    staff = make_staff(4)
+
+    records = []
+    handler = logging.Handler()
+    handler.emit = records.append
+    logger = logging.getLogger("App.controllers.scheduling.stage_timer")
+    logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+    try:
+        with CountQueries() as counter:
+            result = ScheduleClient().auto_populate(admin_id, schedule_id, "even-distribute", staff,
+                                                    date(2025, 1, 6), date(2025, 1, 12))
+    finally:
+        logger.removeHandler(handler)
+
+    assert result["success"]
+    timings = result["timings"]
+    stages = timings["stages"]
+    assert list(stages) == ["preferences", "demand", "cache_lookup", "generate_shifts", "strategy",
+                            "cache_store", "validate", "clear", "save"]
+    assert stages["clear"]["sql_queries"] == stages["preferences"]["sql_queries"] == 1
+    assert stages["demand"]["sql_queries"] == 1
+    assert stages["strategy"]["sql_queries"] == 0
+    assert stages["save"]["sql_queries"] >= 1
+    assert timings["sql_queries"] == counter.count == sum(stage["sql_queries"] for stage in stages.values())
+    assert timings["total_seconds"] >= sum(stage["seconds"] for stage in stages.values())
+
+    lines = [record.getMessage() for record in records]
+    assert len(lines) == len(stages) + 1
+    assert f"auto_populate schedule_id={schedule_id} strategy=even-distribute success=True stage=save" in lines[8]
+    assert "stage=total" in lines[-1]
+
+
+@pytest.mark.parametrize("strategy_name", ["even_distribute", "minimize_days", "shift_type_optimize",
+                                           "preference_based", "day_night_distribute", "optimal"])
+def test_strategies_stop_when_time_budget_runs_out(strategy_name):
+    from App.controllers.scheduling import Scheduler
+
+    staff = [PlainStaff(i) for i in range(1, 5)]
+    shifts = make_shifts(7)
+
+    finished = Scheduler().generate_schedule(strategy_name, staff, shifts, datetime(2025, 1, 1),
+                                             datetime(2025, 1, 7), time_budget=60)
+    assert finished["complete"]
+
+    cut_short = Scheduler().generate_schedule(strategy_name, staff, shifts, datetime(2025, 1, 1),
+                                              datetime(2025, 1, 7), time_budget=0)
+    assert not cut_short["complete"]
+    if strategy_name != "optimal":  # optimal fills unsolved weeks greedily
+        assert all(shift.assigned_staff == [] for shift in shifts)
+
+
+def test_auto_populate_returns_partial_schedule_when_budget_runs_out():
+    from datetime import date
+    from App.controllers.scheduling.schedule_client import ScheduleClient
+
+    staff = make_staff(4)
+    client = ScheduleClient()
+
+    partial = client.auto_populate(None, None, "even-distribute", staff, date(2025, 1, 6), date(2025, 1, 12),
+                                   dry_run=True, time_budget=0)
+    assert partial["success"] and not partial["complete"]
+    assert partial["assignments"] == []
+    assert "validate" not in partial["timings"]["stages"]
+
+    # The partial run was not cached, so the next one does the work
+    full = client.auto_populate(None, None, "even-distribute", staff, date(2025, 1, 6), date(2025, 1, 12),
+                                dry_run=True)
+    assert full["complete"] and not full["cached"]
+    assert len(full["assignments"]) == 12  # everyone is off on Sunday
+
+
+@pytest.mark.parametrize("window_days", [None, 3])
+def test_partial_schedule_keeps_old_shifts_unless_asked(window_days):
+    from datetime import date
+    from App.controllers.scheduling.schedule_client import ScheduleClient
+    from App.models import Schedule, Shift
+
+    admin = create_user("partial_admin", "pass", "admin")
+    schedule = Schedule(name="Partial", created_by=admin.id)
+    db.session.add(schedule)
+    db.session.commit()
+    staff = make_staff(4)
+    db.session.add(Shift(schedule_id=schedule.id, staff_id=staff[0].id,
+                         start_time=datetime(2025, 1, 7, 8), end_time=datetime(2025, 1, 7, 16)))
+    db.session.commit()
+    admin_id, schedule_id = admin.id, schedule.id
+    staff = Staff.query.filter(Staff.id.in_([s.id for s in staff])).order_by(Staff.id).all()
+
+    partial = ScheduleClient().auto_populate(admin_id, schedule_id, "even-distribute", staff, date(2025, 1, 6),
+                                             date(2025, 1, 12), window_days=window_days, time_budget=0)
+    assert partial["success"] and not partial["complete"] and partial["dry_run"]
+    assert partial["shifts_deleted"] == partial["shifts_created"] == 0
+    assert "clear" not in partial["timings"]["stages"]
+    assert Shift.query.filter_by(schedule_id=schedule_id).count() == 1
+
+    saved = ScheduleClient().auto_populate(admin_id, schedule_id, "even-distribute", staff, date(2025, 1, 6),
+                                           date(2025, 1, 12), window_days=window_days, time_budget=0,
+                                           save_partial=True)
+    assert saved["success"] and not saved["complete"] and not saved["dry_run"]
+    assert saved["shifts_deleted"] == 1 and saved["shifts_created"] == 0
+    assert Shift.query.filter_by(schedule_id=schedule_id).count() == 0
+
+
+def test_schedule_metrics_from_assignment_matrix():
+    from App.controllers.scheduling import Scheduler
+    from App.controllers.scheduling.metrics import schedule_metrics
+
+    early, late = PlainStaff(1), PlainStaff(2)
+    preferences = PreferenceSnapshot({1: {'preferred_shift_types': ['morning']},
+                                      2: {'preferred_shift_types': ['morning']}})
+    shifts = make_shifts(2)
+    for shift in shifts:
+        shift.assigned_staff = [early if shift.start_time.hour == 8 else late]
+
+    metrics = schedule_metrics([early, late], shifts, preferences)
+
+    assert metrics["fairness_score"] == 100 and metrics["gini"] == 0
+    assert metrics["hours_variance"] == 0
+    assert metrics["coverage"] == 100
+    assert metrics["preference_satisfaction"] == 50  # only the mornings were wanted
+    assert metrics["day_night_balance"] == 50  # one of two members works every night
+    assert metrics["total_shifts_assigned"] == 4
+
+    # Every strategy reports the same metrics, scored the same way
+    staff = [PlainStaff(i) for i in range(1, 5)]
+    scheduler = Scheduler()
+    for name in scheduler.get_available_strategies():
+        result = scheduler.generate_schedule(name, staff, make_shifts(7), datetime(2025, 1, 1),
+                                             datetime(2025, 1, 7))
+        assert set(result["metrics"]) == set(metrics)
+        assert result["score"] == result["metrics"]["fairness_score"]
+
+
+def test_strategy_scores_come_from_metrics():
+    from App.controllers.scheduling.metrics import distribution_score, efficiency_score
+
+    assert distribution_score(3, 1, 3, 1) == 100
+    assert distribution_score(2, 2, 3, 1) == 50
+    assert distribution_score(0, 0, 3, 1) == 0
+    # Eight hours a day is 80; a member who never worked counts as 0
+    assert efficiency_score([16, 24, 0], [2, 2, 0]) == pytest.approx((80 + 100) / 3)
+    assert efficiency_score([], []) == 0
+
+
+@pytest.mark.parametrize("strategy_name", ["even-distribute", "preference-based", "optimal"])
+def test_auto_populate_fills_demand_profile_by_skill(strategy_name):
+    from datetime import date
+    from App.controllers import replace_demand
+    from App.controllers.scheduling.demand_plan import DemandPlan
+    from App.controllers.scheduling.schedule_client import ScheduleClient
+    from App.models import Schedule
+
+    admin = create_user("demand_admin", "pass", "admin")
+    schedule = Schedule(name="Demand", created_by=admin.id)
+    db.session.add(schedule)
+    db.session.commit()
+    admin_id, schedule_id = admin.id, schedule.id
+    staff = make_staff(6)
+    for person in staff:
+        set_preferences(person.id, skills=["supervisor"] if person is staff[0] else ["cashier"])
+    staff = Staff.query.filter(Staff.id.in_([s.id for s in staff])).order_by(Staff.id).all()
+    supervisor_id = staff[0].id
+
+    # Saturday evening: 3 cashiers and 1 supervisor; Friday overnight: 1 cashier
+    replace_demand(schedule_id, [
+        {"weekday": 5, "shift_type": "evening", "skill": "cashier", "headcount": 3},
+        {"weekday": 5, "shift_type": "evening", "skill": "supervisor", "headcount": 1},
+        {"weekday": 4, "shift_type": "night", "skill": "cashier", "headcount": 1},
+    ])
+    with pytest.raises(ValueError):
+        replace_demand(schedule_id, [{"weekday": 7, "shift_type": "evening"}])
+
+    slots = DemandPlan.load(schedule_id).expand(date(2025, 1, 6), date(2025, 1, 12))
+    assert [(s.start_time, s.end_time, s.required_staff, s.required_skills) for s in slots] == [
+        (datetime(2025, 1, 10, 22), datetime(2025, 1, 11, 6), 1, ("cashier",)),
+        (datetime(2025, 1, 11, 16), datetime(2025, 1, 11, 23, 59), 3, ("cashier",)),
+        (datetime(2025, 1, 11, 16), datetime(2025, 1, 11, 23, 59), 1, ("supervisor",)),
+    ]
+
+    result = ScheduleClient().auto_populate(admin_id, schedule_id, strategy_name, staff,
+                                            date(2025, 1, 6), date(2025, 1, 12), dry_run=True)
+
+    assert result["success"], result.get("message")
+    assert result["demand_profile"]
+    assert result["metrics"]["coverage"] == 100
+    saturday = [a for a in result["assignments"] if a["start_time"] == datetime(2025, 1, 11, 16)]
+    assert len(saturday) == 4
+    # Nobody is booked twice into the overlapping Saturday slots
+    assert len({a["staff_id"] for a in saturday}) == 4 and supervisor_id in {a["staff_id"] for a in saturday}
+
+
+def test_compare_strategies_validates_against_demand_seats():
+    from datetime import date
+    from App.controllers import replace_demand
+    from App.controllers.scheduling.schedule_client import ScheduleClient
+    from App.models import Schedule
+
+    admin = create_user("compare_demand_admin", "pass", "admin")
+    schedule = Schedule(name="Compare demand", created_by=admin.id)
+    db.session.add(schedule)
+    db.session.commit()
+    admin_id, schedule_id = admin.id, schedule.id
+    staff = make_staff(10)
+
+    # Seven seats for ten staff: three are left without a shift by design
+    replace_demand(schedule_id, [{"weekday": day, "shift_type": "morning", "headcount": 1} for day in range(6)]
+                   + [{"weekday": 0, "shift_type": "evening", "headcount": 1}])
+
+    result = ScheduleClient().compare_strategies(admin_id, schedule_id, ["even-distribute", "optimal"], staff,
+                                                 date(2025, 1, 6), date(2025, 1, 12), parallel=False)
+
+    assert result["best_strategy"] is not None
+    for name in ("even-distribute", "optimal"):
+        assert "error" not in result["results"][name], result["results"][name]
+        assert result["results"][name]["assignments_count"] == 7
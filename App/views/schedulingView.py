@@ -1,7 +1,10 @@
 # App/views/schedulingView.py
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app, url_for
 from App.controllers.scheduling.schedule_client import schedule_client 
+from App.controllers.scheduling.job_queue import job_queue
 from App.controllers import get_user
+from App.controllers.preferences import set_preferences
+from App.controllers.demand import get_demand, replace_demand
 from App.models import Schedule, Shift
 from App.database import db
 from datetime import datetime
@@ -51,33 +54,77 @@ def auto_populate_schedule():
         if end_date < start_date:
             return jsonify({'success': False, 'error': 'End date cannot be before start date'}), 400
         
+        options = {
+            'strategy_name': data['strategy_name'],
+            'shifts_per_day': data.get('shifts_per_day', 2),
+            'shift_type': data.get('shift_type', 'mixed'),
+            'optimize': bool(data.get('optimize', False)),
+            'optimize_budget': float(data.get('optimize_budget', 1.0)),
+            'dry_run': bool(data.get('dry_run', False)),
+            'window_days': data.get('window_days'),
+            'time_budget': float(data['time_budget']) if data.get('time_budget') is not None else None,
+            'save_partial': bool(data.get('save_partial', False))
+        }
+        
+        # Queue the run and return at once; progress is polled from the jobs endpoint
+        if data.get('async'):
+            params = dict(options, staff_ids=[staff.id for staff in staff_list],
+                          start_date=start_date.isoformat(), end_date=end_date.isoformat())
+            job = job_queue.submit(current_app._get_current_object(), admin.id, schedule.id, params)
+            return jsonify({
+                'success': True,
+                'job_id': job.id,
+                'status': job.status,
+                'status_url': url_for('scheduling_api.get_job', job_id=job.id)
+            }), 202
+        
         # Create schedule using strategy
         result = schedule_client.auto_populate(
             admin_id=data['admin_id'],
             schedule_id=data['schedule_id'],
-            strategy_name=data['strategy_name'],
             staff_list=staff_list,
             start_date=start_date,
             end_date=end_date,
-            shifts_per_day=data.get('shifts_per_day', 2),
-            shift_type=data.get('shift_type', 'mixed')
+            **options
         )
         
         if result['success']:
-            return jsonify({
+            response = {
                 'success': True,
                 'schedule_id': data['schedule_id'],  # use the schedule ID already passed
                 'strategy_used': data['strategy_name'],
                 'shifts_created': result.get('shifts_created', 0),
                 'summary': result.get('summary', ''),
-                'score': result.get('score', 0)
-            }), 201
+                'score': result.get('score', 0),
+                'metrics': result.get('metrics'),
+                'complete': result.get('complete', True)
+            }
+            if 'local_search' in result:
+                response['local_search'] = result['local_search']
+            if result.get('dry_run'):
+                # Nothing was saved, so hand back the proposed assignments
+                response['dry_run'] = True
+                response['assignments'] = [{
+                    'staff_id': a['staff_id'],
+                    'start_time': a['start_time'].isoformat(),
+                    'end_time': a['end_time'].isoformat()
+                } for a in result.get('assignments', [])]
+                return jsonify(response), 200
+            return jsonify(response), 201
         else:
             return jsonify({'success': False, 'error': result.get('message', 'Auto-population failed')}), 400
         
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 400
 
+@scheduling_api.route('/scheduling/jobs/<int:job_id>', methods=['GET'])
+def get_job(job_id):
+    """Status, progress, timing and result of a background auto-populate job"""
+    job = job_queue.get(job_id)
+    if not job:
+        return jsonify({'success': False, 'error': 'Job not found'}), 404
+    return jsonify({'success': True, 'job': job.get_json()}), 200
+
 @scheduling_api.route('/scheduling/strategies', methods=['GET'])
 def get_strategies():
     """Get available scheduling strategies"""
@@ -138,6 +185,36 @@ def get_schedule_shifts(schedule_id):
         'shifts': [shift.get_json() for shift in shifts]
     }), 200
 
+@scheduling_api.route('/schedules/<int:schedule_id>/demand', methods=['GET'])
+def get_schedule_demand(schedule_id):
+    """Get the demand profile auto-populate fills for a schedule"""
+    schedule = Schedule.query.get(schedule_id)
+    if not schedule:
+        return jsonify({'success': False, 'error': 'Schedule not found'}), 404
+    return jsonify({'success': True, 'demand': get_demand(schedule_id)}), 200
+
+@scheduling_api.route('/schedules/<int:schedule_id>/demand', methods=['PUT'])
+def replace_schedule_demand(schedule_id):
+    """Replace a schedule's demand profile (admin only); an empty list removes it"""
+    data = request.get_json() or {}
+    if 'admin_id' not in data or 'demand' not in data:
+        return jsonify({'success': False, 'error': 'admin_id and demand are required'}), 400
+    
+    admin = get_user(data['admin_id'])
+    if not admin or admin.role != 'admin':
+        return jsonify({'success': False, 'error': 'Admin not found or invalid'}), 403
+    
+    schedule = Schedule.query.get(schedule_id)
+    if not schedule or schedule.created_by != admin.id:
+        return jsonify({'success': False, 'error': 'Schedule not found or access denied'}), 404
+    
+    try:
+        demand = replace_demand(schedule_id, data['demand'])
+    except ValueError as e:
+        db.session.rollback()
+        return jsonify({'success': False, 'error': str(e)}), 400
+    return jsonify({'success': True, 'demand': demand}), 200
+
 @scheduling_api.route('/scheduling/compare', methods=['POST'])
 def compare_strategies():
     """Compare all strategies for a set of staff and dates"""
@@ -177,47 +254,96 @@ def compare_strategies():
         except ValueError:
             return jsonify({'success': False, 'error': 'Invalid date format. Use YYYY-MM-DD'}), 400
         
-        # Compare strategies 
-        comparison_results = {}
-        best_strategy = None
-        best_score = -1
+        # Compare strategies as in-memory dry runs, persisting only the winner if asked
+        result = schedule_client.compare_strategies(
+            admin_id=data['admin_id'],
+            schedule_id=data['schedule_id'],
+            strategy_names=data.get('strategies', ['even-distribute', 'minimize-days', 'preference-based']),
+            staff_list=staff_list,
+            start_date=start_date,
+            end_date=end_date,
+            shifts_per_day=data.get('shifts_per_day', 2),
+            shift_type=data.get('shift_type', 'mixed'),
+            persist=bool(data.get('persist', False))
+        )
         
-        for strategy_name in ['even-distribute', 'minimize-days', 'preference-based']:
-            try:
-                result = schedule_client.auto_populate(
-                    admin_id=data['admin_id'],
-                    schedule_id=data['schedule_id'],
-                    strategy_name=strategy_name,
-                    staff_list=staff_list,
-                    start_date=start_date,
-                    end_date=end_date,
-                    shifts_per_day=data.get('shifts_per_day', 2),
-                    shift_type=data.get('shift_type', 'mixed')
-                )
-                
-                if result['success']:
-                    score = result.get('score', 0)
-                    comparison_results[strategy_name] = {
-                        'shifts_created': result['shifts_created'],
-                        'summary': result['summary'],
-                        'score': score
-                    }
-                    
-                    # Track best strategy
-                    if score > best_score:
-                        best_score = score
-                        best_strategy = strategy_name
-                else:
-                    comparison_results[strategy_name] = {'error': result.get('message', 'Strategy failed')}
-                    
-            except Exception as e:
-                comparison_results[strategy_name] = {'error': str(e)}
+        if not result['success']:
+            return jsonify({'success': False, 'error': result.get('message', 'Comparison failed')}), 400
         
-        return jsonify({
+        comparison_results = {}
+        for strategy_name, outcome in result['results'].items():
+            if 'error' in outcome:
+                comparison_results[strategy_name] = {'error': outcome['error']}
+            else:
+                comparison_results[strategy_name] = {
+                    'assignments': outcome['assignments_count'],
+                    'summary': outcome['summary'],
+                    'score': outcome['score'],
+                    'metrics': outcome.get('metrics'),
+                    'duration_seconds': outcome['duration_seconds']
+                }
+        
+        response = {
             'success': True,
             'comparison': comparison_results,
-            'best_strategy': best_strategy
-        }), 200
+            'best_strategy': result['best_strategy']
+        }
+        if 'shifts_created' in result:
+            response['shifts_created'] = result['shifts_created']
+            response['shifts_deleted'] = result['shifts_deleted']
+        return jsonify(response), 200
+        
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+
+
+@scheduling_api.route('/scheduling/replan', methods=['POST'])
+def replan_schedule():
+    """Re-plan only the shifts affected by one change to a saved schedule"""
+    try:
+        data = request.get_json()
+        
+        # Validate required fields
+        required_fields = ['admin_id', 'schedule_id', 'start_date', 'end_date', 'change']
+        for field in required_fields:
+            if field not in data:
+                return jsonify({'success': False, 'error': f'Missing required field: {field}'}), 400
+        
+        # Get admin user
+        admin = get_user(data['admin_id'])
+        if not admin or admin.role != 'admin':
+            return jsonify({'success': False, 'error': 'Admin not found or invalid'}), 403
+        
+        # Verify schedule exists
+        schedule = Schedule.query.get(data['schedule_id'])
+        if not schedule:
+            return jsonify({'success': False, 'error': 'Schedule not found'}), 404
+        
+        # Parse dates
+        try:
+            start_date = datetime.strptime(data['start_date'], '%Y-%m-%d').date()
+            end_date = datetime.strptime(data['end_date'], '%Y-%m-%d').date()
+        except ValueError:
+            return jsonify({'success': False, 'error': 'Invalid date format. Use YYYY-MM-DD'}), 400
+        
+        change = dict(data['change'])
+        if change.get('type') == 'coverage':
+            try:
+                change['start_time'] = datetime.fromisoformat(change['start_time'])
+                change['end_time'] = datetime.fromisoformat(change['end_time'])
+            except (KeyError, ValueError):
+                return jsonify({'success': False, 'error': 'Coverage needs ISO start_time and end_time'}), 400
+        elif change.get('type') == 'preferences' and 'preferences' in change:
+            # Stage the preference update, then repair the schedule around it;
+            # both are committed together only once the re-plan succeeds
+            set_preferences(change['staff_id'], **change.pop('preferences'), commit=False)
+        
+        result = schedule_client.replan(data['schedule_id'], start_date, end_date, change)
+        if not result['success']:
+            return jsonify({'success': False, 'error': result.get('message', 'Re-plan failed')}), 400
+        db.session.commit()
+        return jsonify(result), 200
         
     except Exception as e:
-        return jsonify({'success': False, 'error': str(e)}), 400
\ No newline at end of file
+        db.session.rollback()
+        return jsonify({'success': False, 'error': str(e)}), 400
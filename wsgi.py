@@ -369,13 +369,45 @@ def view_schedule_command(schedule_id):
         else:
             print("No shifts in this schedule")
 
+@schedule_cli.command("demand", help="Set or show how many staff a schedule needs per weekday and shift")
+@click.argument("schedule_id", type=int)
+@click.option("--weekday", default=None, type=int, help="0 (Monday) to 6 (Sunday)")
+@click.option("--shift-type", default=None, help="morning, evening or night")
+@click.option("--headcount", default=1, help="Staff needed; 0 removes the row")
+@click.option("--skill", default=None, help="Skill the staff must have")
+def demand_command(schedule_id, weekday, shift_type, headcount, skill):
+    from App.controllers import get_demand, set_demand
+    admin = require_admin_login()
+    _print_banner()
+    try:
+        if weekday is not None or shift_type is not None:
+            set_demand(schedule_id, weekday, shift_type, headcount, skill=skill)
+            print("✅ Demand profile updated")
+    except ValueError as e:
+        print(f"❌ {e}")
+        return
+
+    rows = get_demand(schedule_id)
+    if not rows:
+        print("No demand profile - auto-populate will generate its default shifts")
+        return
+    days = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
+    headers = ["Day", "Shift", "Skill", "Staff", "Hours"]
+    _print_table(headers, [[days[row['weekday']], row['shift_type'], row['skill'] or '-', row['headcount'],
+                            f"{row['start_time'] or 'default'} - {row['end_time'] or 'default'}"] for row in rows])
+
 @schedule_cli.command("auto", help="Auto-generate schedule using AI strategies (SPECIAL FEATURE)")
 @click.argument("schedule_id", type=int)
 @click.argument("strategy", default="even-distribute")
 @click.option("--days", default=7, help="Number of days to schedule")
 @click.option("--shifts-per-day", default=2, help="Number of shifts per day")
 @click.option("--shift-type", default="mixed", help="Shift types: day, night, or mixed")
-def auto_schedule_command(schedule_id, strategy, days, shifts_per_day, shift_type):
+@click.option("--dry-run", is_flag=True, help="Preview the schedule without saving it")
+@click.option("--window-days", default=None, type=int, help="Schedule this many days at a time")
+@click.option("--time-budget", default=None, type=float, help="Stop the strategy after this many seconds")
+@click.option("--save-partial", is_flag=True, help="Save the schedule even if the time budget cuts it short")
+def auto_schedule_command(schedule_id, strategy, days, shifts_per_day, shift_type, dry_run, window_days, time_budget,
+                          save_partial):
     from App.controllers.scheduling.schedule_client import schedule_client
     from App.models import Staff, Schedule
     from datetime import datetime, timedelta
@@ -424,13 +456,27 @@ def auto_schedule_command(schedule_id, strategy, days, shifts_per_day, shift_typ
             start_date=start_date,
             end_date=end_date,
             shifts_per_day=shifts_per_day,
-            shift_type=shift_type
+            shift_type=shift_type,
+            dry_run=dry_run,
+            window_days=window_days,
+            time_budget=time_budget,
+            save_partial=save_partial
         )
         
         if result['success']:
-            print(f"\n✅ Schedule auto-generated using '{strategy}' strategy!")
+            # A run cut short comes back as a dry run unless --save-partial was given
+            dry_run = result.get('dry_run', dry_run)
+            if not result.get('complete', True):
+                print("\n⏱️  Time budget ran out - some shifts were left open")
+            if dry_run:
+                print(f"\n🧪 Dry run of '{strategy}' strategy - nothing was saved")
+            else:
+                print(f"\n✅ Schedule auto-generated using '{strategy}' strategy!")
             print(f"📊 Performance Score: {result['score']:.1f}/100")
-            print(f"👥 Shifts Created: {result['shifts_created']}")
+            if dry_run:
+                print(f"👥 Shifts Proposed: {len(result.get('assignments', []))}")
+            else:
+                print(f"👥 Shifts Created: {result['shifts_created']}")
             
             # Handle the summary display properly
             summary = result.get('summary', {})
@@ -460,6 +506,68 @@ def auto_schedule_command(schedule_id, strategy, days, shifts_per_day, shift_typ
     except Exception as e:
         print(f"❌ Failed to auto-generate schedule: {str(e)}")
 
+@schedule_cli.command("batch", help="Auto-generate several schedules in parallel, splitting the staff between them")
+@click.argument("schedule_ids", type=int, nargs=-1, required=True)
+@click.option("--strategy", default="even-distribute", help="Strategy used for every schedule")
+@click.option("--days", default=7, help="Number of days to schedule")
+@click.option("--shifts-per-day", default=2, help="Number of shifts per day")
+@click.option("--shift-type", default="mixed", help="Shift types: day, night, or mixed")
+@click.option("--window-days", default=None, type=int, help="Schedule this many days at a time")
+@click.option("--sequential", is_flag=True, help="Run the schedules one after another in this process")
+def batch_schedule_command(schedule_ids, strategy, days, shifts_per_day, shift_type, window_days, sequential):
+    from App.controllers.scheduling.schedule_client import schedule_client
+    from App.models import Staff, Schedule
+    from datetime import datetime, timedelta
+    
+    admin = require_admin_login()
+    _print_banner()
+    
+    missing = [schedule_id for schedule_id in schedule_ids if not db.session.get(Schedule, schedule_id)]
+    if missing:
+        print(f"❌ Schedule(s) not found: {', '.join(map(str, missing))}")
+        return
+    
+    staff_list = Staff.query.order_by(Staff.id).all()
+    if not staff_list:
+        print("❌ No staff available. Create staff members first.")
+        return
+    
+    available = schedule_client.get_available_strategies()
+    if strategy not in available:
+        print(f"❌ Invalid strategy. Available: {', '.join(available)}")
+        return
+    
+    start_date = datetime.now().date()
+    end_date = start_date + timedelta(days=days)
+    
+    try:
+        print(f"\n🔄 Generating {len(schedule_ids)} {strategy} schedules...")
+        print(f"   👥 Staff: {len(staff_list)} employees split across schedules")
+        result = schedule_client.batch_populate(
+            admin_id=admin.id,
+            schedule_ids=schedule_ids,
+            strategy_name=strategy,
+            staff_list=staff_list,
+            start_date=start_date,
+            end_date=end_date,
+            shifts_per_day=shifts_per_day,
+            shift_type=shift_type,
+            window_days=window_days,
+            parallel=not sequential
+        )
+        
+        headers = ["Schedule", "Staff", "Shifts Created", "Score", "Seconds", "Status"]
+        rows = []
+        for schedule_id, run in result['results'].items():
+            status = "✅" if run.get('success') else f"❌ {run.get('message', 'failed')}"
+            rows.append([schedule_id, run.get('staff_count', 0), run.get('shifts_created', 0),
+                         f"{run.get('score', 0):.1f}", f"{run.get('duration_seconds', 0):.2f}", status])
+        mode = "in parallel" if result['parallel'] else "sequentially"
+        print(f"\n📈 Batch finished {mode} in {result['duration_seconds']:.2f}s")
+        _print_table(headers, rows)
+    except Exception as e:
+        print(f"❌ Failed to run batch: {str(e)}")
+
 # ⚠️ FIX: Move this line OUTSIDE the function and to the module level
 app.cli.add_command(schedule_cli)
 
@@ -577,6 +685,40 @@ def prefs_list_command():
 
 app.cli.add_command(prefs_cli)
 
+bench_cli = AppGroup('bench', help='Benchmark commands')
+
+@bench_cli.command("scheduling", help="Benchmark every strategy on synthetic staff and write JSON results")
+@click.option("--sizes", default="10,100,1000,10000", help="Comma separated staff counts")
+@click.option("--horizons", default="7,30,90", help="Comma separated horizons in days")
+@click.option("--strategies", default="", help="Comma separated strategy names (default: all)")
+@click.option("--seed", default=0, help="Seed for the synthetic workforce")
+@click.option("--output", default="bench_output.json", help="File the JSON results are written to")
+def bench_scheduling_command(sizes, horizons, strategies, seed, output):
+    import json
+    from App.benchmarks import benchmark_app, run_benchmarks
+    
+    report = run_benchmarks(
+        benchmark_app(),
+        sizes=[int(size) for size in sizes.split(',') if size],
+        horizons=[int(days) for days in horizons.split(',') if days],
+        strategies=[name for name in strategies.split(',') if name] or None,
+        seed=seed
+    )
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    
+    headers = ["Strategy", "Staff", "Days", "Seconds", "Peak MB", "SQL", "Fairness", "Gini", "Preferred", "Coverage"]
+    rows = [[r['strategy'], r['staff'], r['days'], r.get('error') or f"skipped: {r['skipped']}",
+             '', '', '', '', '', ''] if 'error' in r or 'skipped' in r else
+            [r['strategy'], r['staff'], r['days'], f"{r['wall_seconds']:.3f}",
+             f"{r['peak_memory_bytes'] / 1e6:.1f}", r['sql_queries'], f"{r['fairness_score']:.1f}",
+             f"{r['gini']:.2f}", f"{r['preference_satisfaction']:.0f}%", f"{r['coverage']:.0%}"]
+            for r in report['results']]
+    _print_table(headers, rows)
+    print(f"✅ Results written to {output}")
+
+app.cli.add_command(bench_cli)
+
 '''
 Test Commands
 '''